@@ -0,0 +1,14 @@
+from .corpus import generate_articles, generate_clusters, generate_cves
+from .runner import BenchmarkResult, compare_results, run_benchmarks
+from .suite import BENCHMARKS, Benchmark
+
+__all__ = [
+    "generate_articles",
+    "generate_clusters",
+    "generate_cves",
+    "BenchmarkResult",
+    "compare_results",
+    "run_benchmarks",
+    "BENCHMARKS",
+    "Benchmark",
+]
@@ -0,0 +1,68 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+
+from .runner import compare_results, results_to_dict, run_benchmarks
+from .suite import BENCHMARKS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the ingest and query hot paths against an in-memory stand-in for Elasticsearch"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[benchmark.name for benchmark in BENCHMARKS],
+        help="Only run these benchmarks",
+    )
+    parser.add_argument("--output", help="Save the results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against results saved earlier")
+    parser.add_argument("--max-regression", type=float, default=0.1)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("elastic_transport").setLevel(logging.WARNING)
+
+    benchmarks = [
+        benchmark
+        for benchmark in BENCHMARKS
+        if not args.only or benchmark.name in args.only
+    ]
+
+    results = run_benchmarks(benchmarks, args.sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results_to_dict(results),
+                },
+                f,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_results(
+                results, json.load(f)["results"], args.max_regression
+            )
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+import random
+
+from ..objects import FullArticle, FullCluster, FullCVE
+
+VOCABULARY_SIZE = 5000
+PROFILES = ["bleepingcomputer", "thehackernews", "securityweek", "darkreading"]
+AUTO_TAGS = ["ransomware", "phishing", "apt", "botnet", "exploit", "zero-day"]
+
+
+def _text(generator: random.Random, words: int) -> str:
+    return " ".join(
+        f"word{int(generator.paretovariate(1.2)) % VOCABULARY_SIZE}"
+        for _ in range(words)
+    )
+
+
+def generate_articles(
+    count: int, seed: int = 0, content_words: int = 800
+) -> list[FullArticle]:
+    generator = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    articles: list[FullArticle] = []
+
+    for i in range(count):
+        content = _text(generator, content_words)
+        profile = generator.choice(PROFILES)
+
+        articles.append(
+            FullArticle.model_validate(
+                {
+                    "id": f"article-{seed}-{i}",
+                    "title": f"Article {i} {_text(generator, 8)}",
+                    "description": _text(generator, 30),
+                    "url": f"https://{profile}.example.com/articles/{i}",
+                    "image_url": f"https://{profile}.example.com/images/{i}.png",
+                    "profile": profile,
+                    "source": profile.capitalize(),
+                    "author": f"Author {generator.randint(1, 50)}",
+                    "publish_date": start + timedelta(minutes=37 * i),
+                    "inserted_at": start + timedelta(minutes=37 * i + 5),
+                    "read_times": generator.randint(0, 100),
+                    "similar": [],
+                    "ml": {
+                        "cluster": str(generator.randint(-1, 50)),
+                        "coordinates": (generator.random(), generator.random()),
+                        "labels": generator.sample(AUTO_TAGS, 2),
+                    },
+                    "tags": {
+                        "automatic": generator.sample(AUTO_TAGS, 3),
+                        "interesting": [
+                            {
+                                "name": "CVEs",
+                                "values": [
+                                    f"CVE-2024-{generator.randint(1000, 1100)}"
+                                ],
+                            }
+                        ],
+                    },
+                    "summary": _text(generator, 60),
+                    "content": content,
+                    "formatted_content": content,
+                }
+            )
+        )
+
+    return articles
+
+
+def generate_clusters(
+    count: int, article_ids: list[str], seed: int = 0
+) -> list[FullCluster]:
+    generator = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    return [
+        FullCluster.model_validate(
+            {
+                "id": f"cluster-{seed}-{i}",
+                "nr": i,
+                "document_count": len(members),
+                "title": _text(generator, 6),
+                "description": _text(generator, 30),
+                "summary": _text(generator, 80),
+                "keywords": generator.sample(AUTO_TAGS, 3),
+                "documents": members,
+                "dating": [
+                    start + timedelta(hours=generator.randint(0, 10_000))
+                    for _ in members
+                ],
+            }
+        )
+        for i in range(count)
+        for members in [
+            generator.sample(article_ids, min(len(article_ids), generator.randint(5, 200)))
+        ]
+    ]
+
+
+def generate_cves(count: int, article_ids: list[str], seed: int = 0) -> list[FullCVE]:
+    generator = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    return [
+        FullCVE.model_validate(
+            {
+                "id": f"cve-{seed}-{i}",
+                "cve": f"CVE-2024-{1000 + i}",
+                "document_count": len(members),
+                "title": f"CVE-2024-{1000 + i}",
+                "description": _text(generator, 50),
+                "keywords": generator.sample(AUTO_TAGS, 2),
+                "publish_date": start + timedelta(days=i % 300),
+                "modified_date": start + timedelta(days=i % 300 + 3),
+                "weaknesses": [f"CWE-{generator.randint(1, 900)}"],
+                "status": "Analyzed",
+                "cvss3": {
+                    "source": "nvd@nist.gov",
+                    "exploitabilityScore": 3.9,
+                    "impactScore": 5.9,
+                    "cvssData": {
+                        "version": "3.1",
+                        "vectorString": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+                        "attackVector": "NETWORK",
+                        "attackComplexity": "LOW",
+                        "privilegesRequired": "NONE",
+                        "userInteraction": "NONE",
+                        "scope": "UNCHANGED",
+                        "confidentialityImpact": "HIGH",
+                        "integrityImpact": "HIGH",
+                        "availabilityImpact": "HIGH",
+                        "baseScore": 9.8,
+                        "baseSeverity": "CRITICAL",
+                    },
+                },
+                "documents": members,
+                "dating": [
+                    start + timedelta(hours=generator.randint(0, 10_000))
+                    for _ in members
+                ],
+                "references": [
+                    {"url": f"https://example.com/advisories/{i}", "source": "nvd"}
+                ],
+            }
+        )
+        for i in range(count)
+        for members in [
+            generator.sample(article_ids, min(len(article_ids), generator.randint(1, 50)))
+        ]
+    ]
@@ -0,0 +1,99 @@
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import gc
+import logging
+from time import perf_counter
+import tracemalloc
+from typing import Any
+
+from .suite import Benchmark
+
+logger = logging.getLogger("osinter")
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    size: int
+    items: int
+    seconds: float
+    throughput: float
+    peak_memory: int
+
+
+def _measure(run: Callable[[], int]) -> tuple[int, float]:
+    gc.collect()
+
+    start = perf_counter()
+    items = run()
+
+    return items, perf_counter() - start
+
+
+def run_benchmarks(
+    benchmarks: list[Benchmark], sizes: list[int], repeat: int = 3
+) -> list[BenchmarkResult]:
+    """Runs every benchmark at every size, keeping the fastest of the timed runs and measuring peak memory in a separate run, as tracing slows it down"""
+    results: list[BenchmarkResult] = []
+
+    for benchmark in benchmarks:
+        for size in sizes:
+            timings = [_measure(benchmark.prepare(size)) for _ in range(repeat)]
+            items, seconds = min(timings, key=lambda timing: timing[1])
+
+            run = benchmark.prepare(size)
+
+            tracemalloc.start()
+            try:
+                run()
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            result = BenchmarkResult(
+                name=benchmark.name,
+                size=size,
+                items=items,
+                seconds=seconds,
+                throughput=items / seconds if seconds else float("inf"),
+                peak_memory=peak_memory,
+            )
+
+            logger.info(
+                f"{result.name}[{result.size}]: {result.throughput:,.1f} items/s, {result.peak_memory / 1024 / 1024:,.1f} MiB peak"
+            )
+
+            results.append(result)
+
+    return results
+
+
+def results_to_dict(results: list[BenchmarkResult]) -> dict[str, dict[str, Any]]:
+    return {f"{result.name}[{result.size}]": asdict(result) for result in results}
+
+
+def compare_results(
+    results: list[BenchmarkResult],
+    baseline: dict[str, dict[str, Any]],
+    max_regression: float = 0.1,
+) -> list[str]:
+    """Returns a description of every benchmark which is more than `max_regression` slower or more memory hungry than the baseline"""
+    regressions: list[str] = []
+
+    for key, result in results_to_dict(results).items():
+        if key not in baseline:
+            continue
+
+        previous = baseline[key]
+
+        if result["throughput"] < previous["throughput"] * (1 - max_regression):
+            regressions.append(
+                f"{key}: throughput dropped from {previous['throughput']:,.1f} to {result['throughput']:,.1f} items/s"
+            )
+
+        if result["peak_memory"] > previous["peak_memory"] * (1 + max_regression):
+            regressions.append(
+                f"{key}: peak memory grew from {previous['peak_memory']:,} to {result['peak_memory']:,} bytes"
+            )
+
+    return regressions
@@ -0,0 +1,244 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from ..elastic import (
+    ArticleSearchQuery,
+    ClusterSearchQuery,
+    CVESearchQuery,
+    ElasticDB,
+    InMemoryNode,
+    create_es_conn,
+    register_script,
+    return_article_db_conn,
+    return_cluster_db_conn,
+    return_cve_db_conn,
+    update_cve_memberships,
+)
+from ..elastic.client import create_document_operation
+from ..elastic.membership import ADD_MEMBERS_SCRIPT
+from ..elastic.helpers import chunk_for_elser
+from ..files import article_to_md
+from .corpus import generate_articles, generate_clusters, generate_cves
+
+STAND_IN_HOST = "benchmarks"
+
+# Prepares the data for a run outside of the measurement, and returns the function to measure, which returns the number of items processed
+Preparer = Callable[[int], Callable[[], int]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    prepare: Preparer
+
+
+def _stand_in() -> Any:
+    InMemoryNode.get_cluster(STAND_IN_HOST, 9200).reset()
+    return create_es_conn(
+        f"http://{STAND_IN_HOST}:9200", False, node_class=InMemoryNode
+    )
+
+
+def _count(items: list[Any], call: Callable[[Any], Any]) -> Callable[[], int]:
+    def run() -> int:
+        for item in items:
+            call(item)
+
+        return len(items)
+
+    return run
+
+
+def prepare_generate_es_query(size: int) -> Callable[[], int]:
+    queries = [
+        ArticleSearchQuery(
+            limit=50,
+            search_term=f"ransomware attack {i}",
+            highlight=i % 2 == 0,
+            sources={"bleepingcomputer", "thehackernews"},
+            cve=f"CVE-2024-{i}" if i % 3 == 0 else None,
+            facets=["sources", "auto_tags"] if i % 4 == 0 else None,
+            sort_by="publish_date",
+        )
+        for i in range(size)
+    ]
+
+    return _count(queries, lambda q: q.generate_es_query("elser", False))
+
+
+def prepare_create_document_operation(size: int) -> Callable[[], int]:
+    articles = generate_articles(size)
+
+    return _count(
+        articles,
+        lambda article: create_document_operation(
+            article, "articles", None, None, None
+        ),
+    )
+
+
+def prepare_create_document_operation_pre_pipelines(
+    size: int,
+) -> Callable[[], int]:
+    articles = generate_articles(size)
+    client = return_article_db_conn(_stand_in(), "articles", "elser", "elser")
+
+    return _count(
+        articles,
+        lambda article: create_document_operation(
+            article, "articles", "elser", "elser", client.pre_pipelines
+        ),
+    )
+
+
+def prepare_chunk_for_elser(size: int) -> Callable[[], int]:
+    documents = [
+        article.model_dump(mode="json") for article in generate_articles(size)
+    ]
+
+    return _count(documents, chunk_for_elser)
+
+
+def _prepare_validation(
+    client_factory: Callable[[Any], ElasticDB[Any, Any, Any, Any]],
+    documents: list[Any],
+    search_q: Any,
+    completeness: bool | list[str],
+) -> Callable[[], int]:
+    client = client_factory(_stand_in())
+    client.save_documents(documents, use_pipeline=False, use_pre_pipelines=False)
+
+    query = search_q.generate_es_query(None, completeness)
+    query["size"] = len(documents)
+    hits = [hit for batch in client.query_hits(query) for hit in batch]
+
+    def run() -> int:
+        return len(client.convert_hits(hits, completeness)[0])
+
+    return run
+
+
+def prepare_validate_articles(
+    completeness: bool | list[str],
+) -> Preparer:
+    return lambda size: _prepare_validation(
+        lambda es: return_article_db_conn(es, "articles", None, None),
+        generate_articles(size),
+        ArticleSearchQuery(limit=size),
+        completeness,
+    )
+
+
+def prepare_validate_full_clusters(size: int) -> Callable[[], int]:
+    article_ids = [f"article-{i}" for i in range(size * 10)]
+
+    return _prepare_validation(
+        lambda es: return_cluster_db_conn(es, "clusters", None, None),
+        generate_clusters(size, article_ids),
+        ClusterSearchQuery(limit=size, exclude_outliers=False),
+        True,
+    )
+
+
+def prepare_validate_full_cves(size: int) -> Callable[[], int]:
+    article_ids = [f"article-{i}" for i in range(size * 10)]
+
+    return _prepare_validation(
+        lambda es: return_cve_db_conn(es, "cves", None, None),
+        generate_cves(size, article_ids),
+        CVESearchQuery(limit=size),
+        True,
+    )
+
+
+def prepare_query_documents(size: int) -> Callable[[], int]:
+    client = return_article_db_conn(_stand_in(), "articles", None, None)
+    client.save_documents(
+        generate_articles(size), use_pipeline=False, use_pre_pipelines=False
+    )
+
+    return lambda: len(
+        client.query_documents(ArticleSearchQuery(limit=size), True)[0]
+    )
+
+
+def prepare_save_documents(size: int) -> Callable[[], int]:
+    client = return_article_db_conn(_stand_in(), "articles", None, None)
+    articles = generate_articles(size)
+
+    return lambda: client.save_documents(
+        articles, use_pipeline=False, use_pre_pipelines=False, chunk_size=500
+    )
+
+
+def _add_members(ctx: dict[str, Any], params: dict[str, Any]) -> None:
+    """Python implementation of ADD_MEMBERS_SCRIPT for the stand-in"""
+    source = ctx["_source"]
+    documents = source.setdefault("documents", [])
+    dating = source.setdefault("dating", [])
+    changed = False
+
+    for document, date in zip(params["documents"], params["dating"]):
+        if document not in documents:
+            documents.append(document)
+
+            if date not in dating:
+                dating.append(date)
+
+            changed = True
+
+    if changed:
+        source["document_count"] = len(documents)
+        source["updated_at"] = params["updated_at"]
+    else:
+        ctx["op"] = "noop"
+
+
+def prepare_update_cve_memberships(size: int) -> Callable[[], int]:
+    register_script(ADD_MEMBERS_SCRIPT, _add_members)
+
+    es = _stand_in()
+    article_client = return_article_db_conn(es, "articles", None, None)
+    cve_client = return_cve_db_conn(es, "cves", None, None)
+
+    # The generated articles mention CVE-2024-1000 to CVE-2024-1100
+    article_client.save_documents(
+        generate_articles(size), use_pipeline=False, use_pre_pipelines=False
+    )
+    cve_client.save_documents(
+        generate_cves(101, []), use_pipeline=False, use_pre_pipelines=False
+    )
+
+    def run() -> int:
+        update_cve_memberships(article_client, cve_client, None)
+        return size
+
+    return run
+
+
+def prepare_article_to_md(size: int) -> Callable[[], int]:
+    return _count(generate_articles(size), article_to_md)
+
+
+BENCHMARKS: list[Benchmark] = [
+    Benchmark("generate_es_query", prepare_generate_es_query),
+    Benchmark("create_document_operation", prepare_create_document_operation),
+    Benchmark(
+        "create_document_operation_pre_pipelines",
+        prepare_create_document_operation_pre_pipelines,
+    ),
+    Benchmark("chunk_for_elser", prepare_chunk_for_elser),
+    Benchmark("validate_base_articles", prepare_validate_articles(False)),
+    Benchmark(
+        "validate_partial_articles",
+        prepare_validate_articles(["title", "url", "publish_date", "tags"]),
+    ),
+    Benchmark("validate_full_articles", prepare_validate_articles(True)),
+    Benchmark("validate_full_clusters", prepare_validate_full_clusters),
+    Benchmark("validate_full_cves", prepare_validate_full_cves),
+    Benchmark("query_documents", prepare_query_documents),
+    Benchmark("save_documents", prepare_save_documents),
+    Benchmark("update_cve_memberships", prepare_update_cve_memberships),
+    Benchmark("article_to_md", prepare_article_to_md),
+]
@@ -1,13 +1,42 @@
+import atexit
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
+import logging.handlers
+import multiprocessing
 import os
-from typing import Any, TypedDict
+import threading
+from time import monotonic
+from typing import Any, TypedDict, TypeVar, cast
+import weakref
+
+from elasticsearch import Elasticsearch
 
 from .elastic import (
+    ConnectionOptions,
+    ElasticDB,
+    RequestTimeouts,
+    ArticleSearchQuery,
+    ClusterSearchQuery,
+    CVESearchQuery,
     create_es_conn,
     return_article_db_conn,
     return_cluster_db_conn,
     return_cve_db_conn,
 )
+from .objects import (
+    BaseArticle,
+    FullArticle,
+    PartialArticle,
+    BaseCluster,
+    FullCluster,
+    PartialCluster,
+    BaseCVE,
+    FullCVE,
+    PartialCVE,
+)
+
+T = TypeVar("T")
 
 
 class LogHandler(TypedDict):
@@ -15,8 +44,92 @@ class LogHandler(TypedDict):
     level: int
 
 
-def configure_logger(name: str = __name__) -> logging.Logger:
-    logger = logging.getLogger(name)
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through one record per `interval` seconds for each `rate_limit_key` given through `extra`, while records without a key always passes.
+    The number of suppressed records is appended to the next record let through for the key.
+    """
+
+    def __init__(self, interval: float = 60) -> None:
+        super().__init__()
+        self.interval = interval
+
+        self._last_emitted: dict[str, float] = {}
+        self._suppressed: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key: str | None = getattr(record, "rate_limit_key", None)
+
+        if key is None:
+            return True
+
+        # The filter is shared by the handlers of a logger, so the decision is kept on the record
+        if hasattr(record, "rate_limited"):
+            return not record.rate_limited
+
+        now = monotonic()
+
+        with self._lock:
+            if now - self._last_emitted.get(key, -self.interval) < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                record.rate_limited = True
+                return False
+
+            self._last_emitted[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+            record.rate_limited = False
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+
+        return True
+
+
+# Loggers configured by configure_logger, along with the listener writing their records in queued mode
+_configured_loggers: dict[str, logging.handlers.QueueListener | None] = {}
+_configure_lock = threading.Lock()
+
+
+def _stop_listeners() -> None:
+    for listener in _configured_loggers.values():
+        if listener:
+            listener.stop()
+
+
+atexit.register(_stop_listeners)
+
+
+def configure_logger(
+    name: str = __name__,
+    queued: bool = False,
+    rate_limit_interval: float | None = 60,
+) -> logging.Logger:
+    """
+    Attaches the stream and file handlers to the logger, and does nothing if the logger is already configured.
+    In queued mode, records are only put on a multiprocessing queue by the calling thread, while a single listener thread writes them to the handlers.
+    Worker processes forked afterwards inherit the queue, so only the listener in the parent process writes to the log files.
+    """
+    with _configure_lock:
+        logger = logging.getLogger(name)
+
+        if name in _configured_loggers:
+            return logger
+
+        _configured_loggers[name] = _configure_logger(
+            logger, name, queued, rate_limit_interval
+        )
+
+        return logger
+
+
+def _configure_logger(
+    logger: logging.Logger,
+    name: str,
+    queued: bool,
+    rate_limit_interval: float | None,
+) -> logging.handlers.QueueListener | None:
     logger.setLevel(logging.DEBUG)
 
     log_handlers: dict[str, LogHandler] = {
@@ -40,13 +153,99 @@ def configure_logger(name: str = __name__) -> logging.Logger:
             log_handlers[handler_name]["level"]
         )
         log_handlers[handler_name]["logger"].setFormatter(logger_format)
-        logger.addHandler(log_handlers[handler_name]["logger"])
 
-    return logger
+    handlers = [handler["logger"] for handler in log_handlers.values()]
+    listener: logging.handlers.QueueListener | None = None
+
+    if queued:
+        queue: "multiprocessing.Queue[logging.LogRecord]" = multiprocessing.Queue(-1)
+
+        listener = logging.handlers.QueueListener(
+            queue, *handlers, respect_handler_level=True
+        )
+        listener.start()
+
+        handlers = [logging.handlers.QueueHandler(queue)]
+
+    rate_limit_filter = (
+        RateLimitFilter(rate_limit_interval) if rate_limit_interval else None
+    )
+
+    for handler in handlers:
+        if rate_limit_filter:
+            handler.addFilter(rate_limit_filter)
+
+        logger.addHandler(handler)
+
+    return listener
+
+
+@dataclass(frozen=True)
+class ElasticConfig:
+    """Picklable snapshot of the Elasticsearch settings, from which worker processes can create their own clients without reading the environment"""
+
+    nodes: list[str]
+    verify_tls: bool
+    cert_path: str | None
+    connection_options: ConnectionOptions
+    request_timeouts: RequestTimeouts
+    article_index: str
+    cluster_index: str
+    cve_index: str
+    elser_pipeline: str | None
+    elser_id: str | None
+
+    def create_es_conn(self) -> Elasticsearch:
+        return create_es_conn(
+            self.nodes,
+            self.verify_tls,
+            self.cert_path,
+            options=self.connection_options,
+        )
+
+    def create_article_client(
+        self, es_conn: Elasticsearch
+    ) -> ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery]:
+        return return_article_db_conn(
+            es_conn,
+            self.article_index,
+            self.elser_pipeline,
+            self.elser_id,
+            request_timeouts=self.request_timeouts,
+        )
+
+    def create_cluster_client(
+        self, es_conn: Elasticsearch
+    ) -> ElasticDB[BaseCluster, PartialCluster, FullCluster, ClusterSearchQuery]:
+        return return_cluster_db_conn(
+            es_conn, self.cluster_index, None, None, request_timeouts=self.request_timeouts
+        )
+
+    def create_cve_client(
+        self, es_conn: Elasticsearch
+    ) -> ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery]:
+        return return_cve_db_conn(
+            es_conn, self.cve_index, None, None, request_timeouts=self.request_timeouts
+        )
+
+
+# Configs whose clients has to be discarded in forked child processes
+_configs: "weakref.WeakSet[BaseConfig]" = weakref.WeakSet()
+
+
+def _reset_clients_after_fork() -> None:
+    for config in list(_configs):
+        config._reset_clients()
+
+
+os.register_at_fork(after_in_child=_reset_clients_after_fork)
 
 
 class BaseConfig:
     def __init__(self) -> None:
+        self._reset_clients()
+        _configs.add(self)
+
         self.OPENAI_KEY = os.environ.get("OPENAI_KEY", None)
         self.OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
         self.OPENAI_TOKEN_LIMIT = int(os.environ.get("OPENAI_TOKEN_LIMIT", 16000))
@@ -63,6 +262,10 @@ class BaseConfig:
         self.ELASTICSEARCH_URL = (
             os.environ.get("ELASTICSEARCH_URL") or "http://localhost:9200"
         )
+        # Multiple nodes can be given as a comma separated list
+        self.ELASTICSEARCH_NODES = [
+            url.strip() for url in self.ELASTICSEARCH_URL.split(",") if url.strip()
+        ]
         self.ELASTICSEARCH_CERT_PATH = (
             os.environ.get("ELASTICSEARCH_CERT_PATH") or "./.elasticsearch.crt"
             if os.path.isfile("./.elasticsearch.crt")
@@ -80,27 +283,98 @@ class BaseConfig:
 
         self.COUCHDB_URL, self.COUCHDB_NAME = self.get_couchdb_details()
 
-        self.es_conn = create_es_conn(
-            self.ELASTICSEARCH_URL,
-            self.ELASTICSEARCH_VERIFY_TLS,
-            self.ELASTICSEARCH_CERT_PATH,
+        self.ELASTICSEARCH_CONNECTION_OPTIONS = self.get_es_connection_options()
+        self.ELASTICSEARCH_REQUEST_TIMEOUTS = self.get_es_request_timeouts()
+
+    def elastic_config(self) -> ElasticConfig:
+        return ElasticConfig(
+            nodes=self.ELASTICSEARCH_NODES,
+            verify_tls=self.ELASTICSEARCH_VERIFY_TLS,
+            cert_path=self.ELASTICSEARCH_CERT_PATH,
+            connection_options=self.ELASTICSEARCH_CONNECTION_OPTIONS,
+            request_timeouts=self.ELASTICSEARCH_REQUEST_TIMEOUTS,
+            article_index=self.ELASTICSEARCH_ARTICLE_INDEX,
+            cluster_index=self.ELASTICSEARCH_CLUSTER_INDEX,
+            cve_index=self.ELASTICSEARCH_CVE_INDEX,
+            elser_pipeline=self.ELASTICSEARCH_ELSER_PIPELINE,
+            elser_id=self.ELASTICSEARCH_ELSER_ID,
         )
 
-        self.es_article_client = return_article_db_conn(
-            self.es_conn,
-            self.ELASTICSEARCH_ARTICLE_INDEX,
-            self.ELASTICSEARCH_ELSER_PIPELINE,
-            self.ELASTICSEARCH_ELSER_ID,
+    def _reset_clients(self) -> None:
+        # A lock held by another thread while forking would never be released in the child
+        self._clients_lock = threading.RLock()
+        self._clients: dict[str, Any] = {}
+        self._clients_pid = os.getpid()
+
+    # The clients are created on first use, and separately in every process, as HTTP connections can't be shared across a fork
+    def _get_client(self, name: str, create: Callable[[], T]) -> T:
+        with self._clients_lock:
+            if self._clients_pid != os.getpid():
+                self._clients = {}
+                self._clients_pid = os.getpid()
+
+            if name not in self._clients:
+                self._clients[name] = create()
+
+            return cast(T, self._clients[name])
+
+    def _set_client(self, name: str, client: Any) -> None:
+        with self._clients_lock:
+            self._clients[name] = client
+
+    @property
+    def es_conn(self) -> Elasticsearch:
+        return self._get_client("es_conn", self.elastic_config().create_es_conn)
+
+    @es_conn.setter
+    def es_conn(self, es_conn: Elasticsearch) -> None:
+        self._set_client("es_conn", es_conn)
+
+    @property
+    def es_article_client(
+        self,
+    ) -> ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery]:
+        return self._get_client(
+            "es_article_client",
+            lambda: self.elastic_config().create_article_client(self.es_conn),
         )
 
-        self.es_cluster_client = return_cluster_db_conn(
-            self.es_conn, self.ELASTICSEARCH_CLUSTER_INDEX, None, None
+    @es_article_client.setter
+    def es_article_client(
+        self,
+        client: ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery],
+    ) -> None:
+        self._set_client("es_article_client", client)
+
+    @property
+    def es_cluster_client(
+        self,
+    ) -> ElasticDB[BaseCluster, PartialCluster, FullCluster, ClusterSearchQuery]:
+        return self._get_client(
+            "es_cluster_client",
+            lambda: self.elastic_config().create_cluster_client(self.es_conn),
         )
 
-        self.es_cve_client = return_cve_db_conn(
-            self.es_conn, self.ELASTICSEARCH_CVE_INDEX, None, None
+    @es_cluster_client.setter
+    def es_cluster_client(
+        self,
+        client: ElasticDB[BaseCluster, PartialCluster, FullCluster, ClusterSearchQuery],
+    ) -> None:
+        self._set_client("es_cluster_client", client)
+
+    @property
+    def es_cve_client(self) -> ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery]:
+        return self._get_client(
+            "es_cve_client",
+            lambda: self.elastic_config().create_cve_client(self.es_conn),
         )
 
+    @es_cve_client.setter
+    def es_cve_client(
+        self, client: ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery]
+    ) -> None:
+        self._set_client("es_cve_client", client)
+
     def __getitem__(self, item: str) -> Any:
         return getattr(self, item)
 
@@ -119,3 +393,41 @@ class BaseConfig:
         COUCHDB_NAME = os.environ.get("USER_DB_NAME") or "osinter_users"
 
         return COUCHDB_URL, COUCHDB_NAME
+
+    @staticmethod
+    def get_es_connection_options() -> ConnectionOptions:
+        def flag(name: str, default: bool = False) -> bool:
+            return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+        return ConnectionOptions(
+            request_timeout=float(os.environ.get("ELASTICSEARCH_TIMEOUT", 30)),
+            connections_per_node=int(
+                os.environ.get("ELASTICSEARCH_CONNECTIONS_PER_NODE", 10)
+            ),
+            http_compress=flag("ELASTICSEARCH_HTTP_COMPRESS"),
+            sniff=flag("ELASTICSEARCH_SNIFF"),
+            min_delay_between_sniffing=float(
+                os.environ.get("ELASTICSEARCH_SNIFF_INTERVAL", 60)
+            ),
+            dead_node_backoff_factor=float(
+                os.environ.get("ELASTICSEARCH_DEAD_NODE_BACKOFF", 1)
+            ),
+            max_dead_node_backoff=float(
+                os.environ.get("ELASTICSEARCH_MAX_DEAD_NODE_BACKOFF", 30)
+            ),
+            max_retries=int(os.environ.get("ELASTICSEARCH_MAX_RETRIES", 3)),
+            retry_on_timeout=flag("ELASTICSEARCH_RETRY_ON_TIMEOUT"),
+        )
+
+    @staticmethod
+    def get_es_request_timeouts() -> RequestTimeouts:
+        return RequestTimeouts(
+            search=float(os.environ.get("ELASTICSEARCH_SEARCH_TIMEOUT", 30)),
+            bulk=float(os.environ.get("ELASTICSEARCH_BULK_TIMEOUT", 120)),
+            scan=float(os.environ.get("ELASTICSEARCH_SCAN_TIMEOUT", 300)),
+            write=float(os.environ.get("ELASTICSEARCH_WRITE_TIMEOUT", 30)),
+            retry_reads_on_timeout=os.environ.get(
+                "ELASTICSEARCH_RETRY_READS_ON_TIMEOUT", "true"
+            ).lower()
+            in ("1", "true", "yes"),
+        )
@@ -1,7 +1,38 @@
-from .client import DocumentObjectClasses, PrePipeline, ElasticDB
-from .queries import SearchQuery, ClusterSearchQuery, CVESearchQuery, ArticleSearchQuery
+from .client import (
+    DocumentObjectClasses,
+    PrePipeline,
+    ElasticDB,
+    RequestTimeouts,
+    IngestResult,
+    deterministic_id,
+)
+from .queries import (
+    SearchQuery,
+    ClusterSearchQuery,
+    CVESearchQuery,
+    ArticleSearchQuery,
+    encode_cursor,
+    decode_cursor,
+)
 from .configs import ES_INDEX_CONFIGS, ES_SEARCH_APPLICATIONS, SearchTemplate
+from .cache import DocumentCache, LRUCache
+from .columnar import export_index, index_schema
+from .metrics import MetricsCallback, MetricsRegistry, OperationMetrics
+from .slowlog import SlowQuery, SlowQueryLog
+from .duplicates import MinHasher, NearDuplicateIndex
+from .memory import InMemoryCluster, InMemoryNode, register_script
+from .replica import LocalReplica
+from .snapshot import dump, migrate_index, restore
+from .lazy import query_lazy_articles
+from .projection import MLProjection, project_ml
+from .membership import (
+    MembershipPage,
+    query_cluster_members,
+    query_cve_members,
+    update_cve_memberships,
+)
 from .helpers import (
+    ConnectionOptions,
     create_es_conn,
     return_article_db_conn,
     return_cluster_db_conn,
@@ -13,19 +44,51 @@ from .objects import (
     TermAggBucket,
     SignificantTermAgg,
     SignificantTermAggBucket,
+    DateHistogram,
 )
 
 __all__ = [
     "DocumentObjectClasses",
     "PrePipeline",
     "ElasticDB",
+    "RequestTimeouts",
+    "IngestResult",
+    "deterministic_id",
     "SearchQuery",
     "ClusterSearchQuery",
     "CVESearchQuery",
     "ArticleSearchQuery",
+    "encode_cursor",
+    "decode_cursor",
     "ES_INDEX_CONFIGS",
     "ES_SEARCH_APPLICATIONS",
     "SearchTemplate",
+    "LRUCache",
+    "DocumentCache",
+    "export_index",
+    "index_schema",
+    "MetricsCallback",
+    "MetricsRegistry",
+    "OperationMetrics",
+    "SlowQuery",
+    "SlowQueryLog",
+    "MinHasher",
+    "NearDuplicateIndex",
+    "InMemoryCluster",
+    "InMemoryNode",
+    "register_script",
+    "LocalReplica",
+    "dump",
+    "restore",
+    "migrate_index",
+    "query_lazy_articles",
+    "MLProjection",
+    "project_ml",
+    "MembershipPage",
+    "query_cluster_members",
+    "query_cve_members",
+    "update_cve_memberships",
+    "ConnectionOptions",
     "create_es_conn",
     "return_article_db_conn",
     "return_cluster_db_conn",
@@ -34,4 +97,5 @@ __all__ = [
     "TermAggBucket",
     "SignificantTermAgg",
     "SignificantTermAggBucket",
+    "DateHistogram",
 ]
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from time import monotonic
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU cache, where entries optionally expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+            inserted_at, value = self._entries[key]
+
+            if self.ttl is not None and monotonic() - inserted_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        if self.maxsize < 1:
+            return
+
+        with self._lock:
+            self._entries[key] = (monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class CachedDocument:
+    seq_no: int
+    primary_term: int
+    source: dict[str, Any]
+    # The source fields which were fetched, or None when the whole source was
+    fields: frozenset[str] | None
+
+
+class DocumentCache:
+    """
+    Read-through cache of document sources by ID, along with the sequence number and primary term they were read at.
+    Writes invalidate the cached document and remember the version they produced, so a read which started before the write can't put the older version back in the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.documents: LRUCache[str, CachedDocument] = LRUCache(maxsize, ttl)
+        self.written_versions: LRUCache[str, tuple[int, int]] = LRUCache(maxsize, ttl)
+
+    def get(self, id: str, fields: frozenset[str] | None) -> dict[str, Any] | None:
+        """Returns the cached source if it contains the requested fields, limited to those fields"""
+        cached = self.documents.get(id)
+
+        if cached is None:
+            return None
+
+        if fields is None:
+            return cached.source if cached.fields is None else None
+
+        if cached.fields is not None and not fields <= cached.fields:
+            return None
+
+        top_level_fields = {field.split(".")[0] for field in fields}
+
+        return {
+            key: value
+            for key, value in cached.source.items()
+            if key in top_level_fields
+        }
+
+    def add(
+        self,
+        id: str,
+        seq_no: int,
+        primary_term: int,
+        source: dict[str, Any],
+        fields: frozenset[str] | None,
+    ) -> None:
+        written_version = self.written_versions.get(id)
+
+        if written_version and written_version > (primary_term, seq_no):
+            return
+
+        self.documents.set(id, CachedDocument(seq_no, primary_term, source, fields))
+
+    def invalidate(
+        self, id: str, seq_no: int | None = None, primary_term: int | None = None
+    ) -> None:
+        self.documents.pop(id)
+
+        if seq_no is not None and primary_term is not None:
+            self.written_versions.set(id, (primary_term, seq_no))
+
+    def clear(self) -> None:
+        self.documents.clear()
+        self.written_versions.clear()
+
+    def __len__(self) -> int:
+        return len(self.documents)
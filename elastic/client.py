@@ -1,9 +1,13 @@
-from collections.abc import Callable, Generator, Sequence, Set
-from dataclasses import dataclass
+from collections.abc import Callable, Generator, Iterable, Sequence, Set
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
 import functools
+import hashlib
 import itertools
+import json
 import logging
-from time import sleep
+from time import perf_counter, sleep, time
 from typing import (
     Any,
     Generic,
@@ -15,19 +19,44 @@ from typing import (
 )
 from typing_extensions import TypedDict
 import multiprocessing
+import multiprocessing.pool
 
 from elastic_transport import ObjectApiResponse
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
 from elasticsearch.client import TasksClient
 
 from pydantic import ValidationError
 
 from ..objects import BaseDocument, FullDocument, PartialDocument, AbstractDocument, AbstractPartialDocument
-from .queries import SearchQuery
+from .cache import DocumentCache, LRUCache
+from .duplicates import NearDuplicateIndex
+from .metrics import MetricsCallback, OperationMetrics
+from .slowlog import SlowQueryLog
+from .objects import DateHistogram
+from .queries import SearchQuery, decode_cursor, encode_cursor
 
 logger = logging.getLogger("osinter")
 
+CALENDAR_INTERVALS = {
+    "minute",
+    "1m",
+    "hour",
+    "1h",
+    "day",
+    "1d",
+    "week",
+    "1w",
+    "month",
+    "1M",
+    "quarter",
+    "1q",
+    "year",
+    "1y",
+}
+
+OperationKind = Literal["search", "bulk", "scan", "write"]
+
 AnyDocument = TypeVar("AnyDocument")
 SearchQueryType = TypeVar("SearchQueryType", bound=SearchQuery)
 
@@ -41,6 +70,20 @@ class DocumentObjectClasses(
     search_query: Type[SearchQueryType]
 
 
+@dataclass(frozen=True)
+class RequestTimeouts:
+    """
+    Request timeouts in seconds per kind of operation, where None keeps the timeout of the client. `write` covers writes of single documents.
+    Searches and scans are retried after timing out when `retry_reads_on_timeout` is set, while bulk and single writes follow the client, as they might already have been applied.
+    """
+
+    search: float | None = None
+    bulk: float | None = None
+    scan: float | None = None
+    write: float | None = None
+    retry_reads_on_timeout: bool = True
+
+
 # The function assigned to call needs to be global in order for the multiprocessing to work
 @dataclass
 class PrePipeline:
@@ -48,6 +91,46 @@ class PrePipeline:
     call: Callable[[dict[str, Any]], dict[str, Any]]
     requires_elser: bool
     requires_pipeline: bool
+    # The source fields the pre-pipeline reads, allowing it to be skipped when they are unchanged. None means it always runs
+    input_fields: list[str] | None = None
+
+
+def pre_pipeline_applies(
+    pre_pipeline: PrePipeline, elser_model_id: str | None, pipeline: str | None
+) -> bool:
+    if pre_pipeline.requires_elser and not elser_model_id:
+        return False
+    if pre_pipeline.requires_pipeline and not pipeline:
+        return False
+
+    return True
+
+
+def content_hashes(
+    document: AbstractDocument | AbstractPartialDocument,
+    signatures: dict[str, list[str]],
+) -> dict[str, str]:
+    """
+    Hashes the JSON value of each of the fields which are set along with the processing it goes through, given by the signature of the field.
+    A stored hash therefore only matches when the field was last written with the same value and processed the same way.
+    """
+    values = document.model_dump(
+        include=set(signatures), exclude_none=True, mode="json"
+    )
+
+    return {
+        field: hashlib.blake2b(
+            json.dumps([values[field], signature], sort_keys=True).encode(),
+            digest_size=16,
+        ).hexdigest()
+        for field, signature in signatures.items()
+        if field in values
+    }
+
+
+def update_timestamp() -> str:
+    """The time of a write, stored in the updated_at field of the changed documents for following changes"""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
 
 
 # Needs to be global to allow pickling for multiprocessing
@@ -57,27 +140,62 @@ def create_document_operation(
     elser_model_id: str | None,
     pipeline: str | None,
     pre_pipelines: list[PrePipeline] | None,
+    stage_timings: dict[str, float] | None = None,
+    serialize: bool = True,
+    hash_signatures: dict[str, list[str]] | None = None,
 ) -> dict[str, Any]:
-    def run_pre_pipeline(doc: dict[str, Any], pipeline: PrePipeline) -> dict[str, Any]:
-        if pipeline.requires_elser and not elser_model_id:
-            return doc
-        if pipeline.requires_pipeline and not pipeline:
-            return doc
+    """
+    Creates a bulk index operation for the document.
+    When no pre-pipelines apply and `serialize` is set, the source is dumped by pydantic straight to JSON bytes, which the transport sends as-is.
+    The hashes of the fields in `hash_signatures` are stored in the content_hashes field of the source, so the signatures should match the pipelines applied here.
+    The source is stamped with the time of the write in the updated_at field, which the change feed follows.
+    """
+    applicable_pre_pipelines = [
+        pre_pipeline
+        for pre_pipeline in pre_pipelines or []
+        if pre_pipeline_applies(pre_pipeline, elser_model_id, pipeline)
+    ]
+
+    operation: dict[str, Any] = {"_index": index_name, "_id": document.id}
+
+    start = perf_counter()
+
+    # The timestamp and hashes aren't part of the document model, so they are added to the source once it's dumped
+    extra_fields: dict[str, Any] = {"updated_at": update_timestamp()}
+
+    if hash_signatures:
+        extra_fields["content_hashes"] = content_hashes(document, hash_signatures)
+
+    if serialize and not applicable_pre_pipelines:
+        source = document.__pydantic_serializer__.to_json(
+            document, exclude={"highlights", "id"}, exclude_none=True
+        )
 
-        return pipeline.call(doc)
+        # Appended to the end of the serialized object, as parsing it again would defeat the purpose
+        source = (
+            source[:-1]
+            + (b"," if source != b"{}" else b"")
+            + json.dumps(extra_fields)[1:].encode()
+        )
 
-    doc = document.model_dump(exclude={"highlights"}, exclude_none=True, mode="json")
+        operation["_source"] = source
+    else:
+        operation["_source"] = {
+            **document.model_dump(
+                exclude={"highlights", "id"}, exclude_none=True, mode="json"
+            ),
+            **extra_fields,
+        }
 
-    if pre_pipelines:
-        for pre_pipeline in pre_pipelines:
-            doc = run_pre_pipeline(doc, pre_pipeline)
+    if stage_timings is not None:
+        stage_timings["serialization"] = perf_counter() - start
 
-    operation: dict[str, Any] = {
-        "_index": index_name,
-        "_source": doc,
-    }
+    for pre_pipeline in applicable_pre_pipelines:
+        start = perf_counter()
+        operation["_source"] = pre_pipeline.call(operation["_source"])
 
-    operation["_id"] = operation["_source"].pop("id")
+        if stage_timings is not None:
+            stage_timings[pre_pipeline.name] = perf_counter() - start
 
     if pipeline:
         operation["pipeline"] = pipeline
@@ -93,9 +211,52 @@ def create_document_update_operation(
     elser_model_id: str | None,
     pipeline: str | None,
     pre_pipelines: list[PrePipeline] | None,
+    stage_timings: dict[str, float] | None = None,
+    hash_signatures: dict[str, list[str]] | None = None,
+    stored_hashes: dict[str, dict[str, str]] | None = None,
+    pipeline_input_fields: list[str] | None = None,
 ) -> dict[str, Any]:
+    """
+    Creates a bulk update operation for the document.
+    When the content hashes stored for the document are given, the hashed fields last written with the same value and processing are left out, along with the pre-pipelines and ingest pipeline reading only such fields.
+    """
+    hashes = content_hashes(document, hash_signatures) if hash_signatures else {}
+    previous_hashes = (stored_hashes or {}).get(document.id)
+
+    # Fields which aren't set or aren't part of the update are unchanged as well
+    unchanged = (
+        {
+            field
+            for field in hash_signatures or {}
+            if field not in hashes
+            or (fields and field not in fields)
+            or previous_hashes.get(field) == hashes[field]
+        }
+        if previous_hashes is not None
+        else set()
+    )
+
+    if unchanged:
+        pre_pipelines = [
+            pre_pipeline
+            for pre_pipeline in pre_pipelines or []
+            if pre_pipeline.input_fields is None
+            or not unchanged.issuperset(pre_pipeline.input_fields)
+        ]
+
+        if pipeline_input_fields is not None and unchanged.issuperset(
+            pipeline_input_fields
+        ):
+            pipeline = None
+
     operation = create_document_operation(
-        document, index_name, elser_model_id, pipeline, pre_pipelines
+        document,
+        index_name,
+        elser_model_id,
+        pipeline,
+        pre_pipelines,
+        stage_timings,
+        serialize=False,
     )
 
     operation["_op_type"] = "update"
@@ -103,12 +264,78 @@ def create_document_update_operation(
     operation["doc"] = operation["_source"]
     del operation["_source"]
 
+    # Only stamped back once it's known that the update changes anything
+    updated_at = operation["doc"].pop("updated_at", None)
+
     if fields:
         operation["doc"] = {field: operation["doc"][field] for field in fields}
 
+    for field in unchanged:
+        operation["doc"].pop(field, None)
+
+    changed_hashes = {
+        field: hash for field, hash in hashes.items() if field in operation["doc"]
+    }
+
+    if changed_hashes:
+        operation["doc"]["content_hashes"] = changed_hashes
+
+    if operation["doc"] and updated_at:
+        operation["doc"]["updated_at"] = updated_at
+
     return operation
 
 
+# Needs to be global to allow pickling for multiprocessing
+def create_document_create_operation(
+    document: AbstractDocument | AbstractPartialDocument,
+    index_name: str,
+    elser_model_id: str | None,
+    pipeline: str | None,
+    pre_pipelines: list[PrePipeline] | None,
+    stage_timings: dict[str, float] | None = None,
+    hash_signatures: dict[str, list[str]] | None = None,
+) -> dict[str, Any]:
+    operation = create_document_operation(
+        document,
+        index_name,
+        elser_model_id,
+        pipeline,
+        pre_pipelines,
+        stage_timings,
+        hash_signatures=hash_signatures,
+    )
+
+    operation["_op_type"] = "create"
+
+    return operation
+
+
+def deterministic_id(unique_value: str) -> str:
+    """Derives a document ID from the value of the unique field, so the same document always gets the same ID regardless of who ingests it"""
+    return hashlib.sha256(unique_value.encode()).hexdigest()
+
+
+@dataclass
+class IngestResult:
+    created: list[str]
+    # IDs of documents which were already present, and therefore left untouched
+    existing: list[str]
+    # Error reasons by the ID of the failed document
+    failed: dict[str, str]
+    # IDs of the indexed documents which near-duplicates were left out for, by the ID of the left out document
+    duplicates: dict[str, str]
+
+
+# Needs to be global to allow pickling for multiprocessing
+def create_timed_operation(
+    create_operation: Callable[..., dict[str, Any]],
+    document: AbstractDocument | AbstractPartialDocument,
+) -> tuple[dict[str, Any], dict[str, float]]:
+    stage_timings: dict[str, float] = {}
+    return create_operation(document, stage_timings=stage_timings), stage_timings
+
+
 class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQueryType]):
     def __init__(
         self,
@@ -122,6 +349,15 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
             BaseDocument, PartialDocument, FullDocument, SearchQueryType
         ],
         pre_pipelines: list[PrePipeline] | None = None,
+        facet_cache_size: int = 256,
+        facet_cache_ttl: float | None = 60,
+        duplicate_index: NearDuplicateIndex | None = None,
+        metrics_callbacks: list[MetricsCallback] | None = None,
+        slow_query_log: SlowQueryLog | None = None,
+        request_timeouts: RequestTimeouts | None = None,
+        document_cache_size: int = 1024,
+        document_cache_ttl: float | None = 60,
+        pipeline_input_fields: list[str] | None = None,
     ):
         self.es: Elasticsearch = es_conn
         self.index_name: str = index_name
@@ -136,6 +372,206 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
 
         self.pre_pipelines = pre_pipelines if pre_pipelines else []
 
+        # The fields read by the ingest pipeline and pre-pipelines are hashed on write, to detect when they have to run again
+        self.pipeline_input_fields = pipeline_input_fields
+        self.hash_fields = sorted(
+            set(pipeline_input_fields or []).union(
+                *[pre_pipeline.input_fields or [] for pre_pipeline in self.pre_pipelines]
+            )
+        )
+
+        self.duplicate_index = duplicate_index
+
+        self.facet_cache: LRUCache[str, dict[str, dict[str, int]]] = LRUCache(
+            facet_cache_size, facet_cache_ttl
+        )
+
+        self.document_cache = DocumentCache(document_cache_size, document_cache_ttl)
+
+        self.metrics_callbacks = metrics_callbacks if metrics_callbacks else []
+        self.slow_query_log = slow_query_log
+        self.request_timeouts = request_timeouts or RequestTimeouts()
+
+    def hash_signatures(
+        self, use_pipeline: bool, use_pre_pipelines: bool
+    ) -> dict[str, list[str]]:
+        """
+        Returns the signature of each hashed field when writing with the given options, naming the ingest pipeline and pre-pipelines which process it, along with the ELSER model they use.
+        The signature is part of the content hash, so fields written without a pipeline, or with another pipeline or model, don't let later writes skip it.
+        """
+        pipeline = self.ingest_pipeline if use_pipeline else None
+        signatures: dict[str, list[str]] = {field: [] for field in self.hash_fields}
+
+        if pipeline:
+            for field in self.pipeline_input_fields or []:
+                signatures[field].append(f"pipeline:{pipeline}:{self.elser_model_id}")
+
+        for pre_pipeline in self.pre_pipelines if use_pre_pipelines else []:
+            if not pre_pipeline_applies(pre_pipeline, self.elser_model_id, pipeline):
+                continue
+
+            name = f"pre_pipeline:{pre_pipeline.name}"
+
+            if pre_pipeline.requires_elser:
+                name += f":{self.elser_model_id}"
+
+            for field in pre_pipeline.input_fields or []:
+                signatures[field].append(name)
+
+        return signatures
+
+    def _client(self, kind: OperationKind) -> Elasticsearch:
+        options: dict[str, Any] = {}
+
+        timeout = getattr(self.request_timeouts, kind)
+
+        if timeout is not None:
+            options["request_timeout"] = timeout
+
+        if kind in ("search", "scan") and self.request_timeouts.retry_reads_on_timeout:
+            options["retry_on_timeout"] = True
+
+        return self.es.options(**options) if options else self.es
+
+    @contextmanager
+    def _measure(self, operation: str) -> Generator[OperationMetrics, None, None]:
+        metrics = OperationMetrics(operation=operation, index=self.index_name)
+        start = perf_counter()
+
+        try:
+            yield metrics
+        except GeneratorExit:
+            # Raised when a generator such as scroll_documents is closed early
+            raise
+        except BaseException:
+            metrics.failed = True
+            raise
+        finally:
+            metrics.wall_time = perf_counter() - start
+
+            for callback in self.metrics_callbacks:
+                try:
+                    callback(metrics)
+                except Exception as e:
+                    logger.error(
+                        f'Metrics callback failed for operation "{operation}": {e}'
+                    )
+
+    def _search(
+        self,
+        metrics: OperationMetrics | None,
+        kind: OperationKind = "search",
+        **query: Any,
+    ) -> ObjectApiResponse[Any]:
+        slow_query_log = self.slow_query_log
+
+        if slow_query_log and slow_query_log.sample_profile():
+            query["profile"] = True
+
+        es = self._client(kind)
+
+        start = perf_counter()
+        response = es.search(**query)
+        wall_time = perf_counter() - start
+
+        if metrics:
+            metrics.record_response(response)
+
+        if slow_query_log and slow_query_log.is_slow(wall_time):
+            profile: dict[str, Any] | None = None
+
+            if "profile" not in response and slow_query_log.profile_slow_queries:
+                try:
+                    profile = es.search(**query, profile=True)["profile"]
+                except Exception as e:
+                    logger.error(f"Failed to profile slow query: {e}")
+
+            slow_query_log.record(
+                metrics.operation if metrics else "search",
+                query.get("index") or self.index_name,
+                query,
+                wall_time,
+                response.body,
+                profile,
+            )
+
+        return response
+
+    def _collect_stage_timings(
+        self,
+        operations: Iterable[tuple[dict[str, Any], dict[str, float]]],
+        metrics: OperationMetrics,
+    ) -> Generator[dict[str, Any], None, None]:
+        for operation, stage_timings in operations:
+            metrics.document_count += 1
+            metrics.record_stages(stage_timings)
+            yield operation
+
+    def _bulk(
+        self, operations: Iterable[dict[str, Any]], thread_count: int = 1, **kwargs: Any
+    ) -> int:
+        """Sends the operations in bulk requests, invalidating the cached version of every written document"""
+        succeeded = 0
+
+        results = (
+            parallel_bulk(
+                self._client("bulk"), operations, thread_count=thread_count, **kwargs
+            )
+            if thread_count > 1
+            else streaming_bulk(self._client("bulk"), operations, **kwargs)
+        )
+
+        for ok, item in results:
+            result = next(iter(item.values()))
+
+            self.document_cache.invalidate(
+                result["_id"], result.get("_seq_no"), result.get("_primary_term")
+            )
+            succeeded += ok
+
+        return succeeded
+
+    def bulk(
+        self,
+        operations: Iterable[dict[str, Any]],
+        thread_count: int = 1,
+        chunk_size: int = 500,
+        raise_on_error: bool = True,
+    ) -> int:
+        """
+        Sends prepared operations, such as the ones created by create_document_operation, in bulk requests and returns the number which succeeded.
+        With a `thread_count` above 1 the requests are sent in parallel.
+        """
+        with self._measure("bulk") as metrics:
+            succeeded = self._bulk(
+                operations,
+                thread_count=thread_count,
+                chunk_size=chunk_size,
+                raise_on_error=raise_on_error,
+            )
+            metrics.document_count = succeeded
+
+        return succeeded
+
+    def _existing_ids(
+        self, unique_values: list[str], metrics: OperationMetrics | None = None
+    ) -> dict[str, str]:
+        """Returns the IDs of the documents present with the given values of the unique field, by value"""
+        ids: dict[str, str] = {}
+
+        for value_batch in itertools.batched(unique_values, 10000):
+            hits = self._search(
+                metrics,
+                index=self.index_name,
+                query={"terms": {self.unique_field: value_batch}},
+                source_includes=[self.unique_field],
+                size=10000,
+            )["hits"]["hits"]
+
+            ids.update({str(hit["_source"][self.unique_field]): hit["_id"] for hit in hits})
+
+        return ids
+
     def exists_in_db(self, token: str | list[str]) -> list[str]:
         """Returns list of attributes for documents which exists in DB"""
 
@@ -143,21 +579,23 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
 
         remote_document_attributes: list[str] = []
 
-        for token_batch in itertools.batched(token_list, 10000):
+        with self._measure("exists_in_db") as metrics:
+            for token_batch in itertools.batched(token_list, 10000):
 
-            search_result = self.es.search(
-                index=self.index_name,
-                query={"terms": {self.unique_field: token_batch}},
-                source_includes=[self.unique_field],
-                size=10000,
-            )
+                search_result = self._search(
+                    metrics,
+                    index=self.index_name,
+                    query={"terms": {self.unique_field: token_batch}},
+                    source_includes=[self.unique_field],
+                    size=10000,
+                )
 
-            remote_document_attributes.extend(
-                [
-                    result["_source"][self.unique_field]
-                    for result in search_result["hits"]["hits"]
-                ]
-            )
+                remote_document_attributes.extend(
+                    [
+                        result["_source"][self.unique_field]
+                        for result in search_result["hits"]["hits"]
+                    ]
+                )
 
         return remote_document_attributes
 
@@ -165,7 +603,10 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
         self,
         hits: list[dict[str, Any]],
         convert: Callable[[dict[str, Any]], AnyDocument],
+        metrics: OperationMetrics | None = None,
     ) -> tuple[list[AnyDocument], list[dict[str, Any]]]:
+        start = perf_counter()
+
         for result in hits:
             if "highlight" in result and len(result) > 0:
                 result["_source"]["highlights"] = {}
@@ -176,42 +617,123 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
 
         valid_docs: list[AnyDocument] = []
         invalid_docs: list[dict[str, Any]] = []
+        first_error: ValidationError | None = None
 
         for hit in hits:
+            # Validating the source in place, instead of copying it into a new dict with the ID
+            source = hit["_source"]
+            source["id"] = hit["_id"]
+
             try:
-                valid_docs.append(convert({"id": hit["_id"], **hit["_source"]}))
+                valid_docs.append(convert(source))
             except ValidationError as e:
-                logger.error(
-                    f'Encountered problem with article with ID "{hit["_id"]}" and title "{hit["_source"]["title"]}", skipping for now. Error: {e}'
-                )
-
+                first_error = first_error or e
                 invalid_docs.append(hit)
 
+        # Summarizing the batch in a single record, so no IDs are lost to rate limiting while large batches doesn't flood the log
+        if invalid_docs:
+            first = invalid_docs[0]
+
+            logger.error(
+                f'Skipping {len(invalid_docs)} invalid documents from "{self.index_name}" with IDs {", ".join(hit["_id"] for hit in invalid_docs)}. '
+                f'Error for document with ID "{first["_id"]}" and title "{first["_source"].get("title")}": {first_error}',
+                extra={"rate_limit_key": f"validation-{self.index_name}"},
+            )
+
+        if metrics:
+            metrics.validation_time += perf_counter() - start
+            metrics.invalid_count += len(invalid_docs)
+
         return valid_docs, invalid_docs
 
+    def convert_hits(
+        self,
+        hits: list[dict[str, Any]],
+        completeness: bool | list[str],
+        metrics: OperationMetrics | None = None,
+    ) -> tuple[
+        list[BaseDocument] | list[PartialDocument] | list[FullDocument],
+        list[dict[str, Any]],
+    ]:
+        """Validates raw search hits, such as the ones yielded by query_hits, as the document class matching the completeness they were queried with"""
+        if completeness is False:
+            p1: tuple[list[BaseDocument], list[dict[str, Any]]] = (
+                self._process_search_results(
+                    hits,
+                    lambda data: self.document_object_class["base"].model_validate(
+                        data
+                    ),
+                    metrics,
+                )
+            )
+
+            return p1
+        elif completeness is True:
+            p2: tuple[list[FullDocument], list[dict[str, Any]]] = (
+                self._process_search_results(
+                    hits,
+                    lambda data: self.document_object_class["full"].model_validate(
+                        data
+                    ),
+                    metrics,
+                )
+            )
+
+            return p2
+        elif isinstance(completeness, list):
+            p3: tuple[list[PartialDocument], list[dict[str, Any]]] = (
+                self._process_search_results(
+                    hits,
+                    lambda data: self.document_object_class["partial"].model_validate(
+                        data, context={"fields_to_validate": completeness}
+                    ),
+                    metrics,
+                )
+            )
+            return p3
+        else:
+            raise NotImplemented
+
     def _query_large(
         self,
         query: dict[str, Any],
         *,
         batch_size: int = 10_000,
+        pit_id: str | None = None,
         pit_keep_alive: str = "1m",
+        metrics: OperationMetrics | None = None,
     ) -> Generator[list[dict[str, Any]], None, None]:
-        pit_id: str = self.es.open_point_in_time(
-            index=self.index_name, keep_alive=pit_keep_alive
-        )["id"]
+        # A point in time given by the caller is shared with other scans, and is left for the caller to close
+        owns_pit = pit_id is None
+
+        if pit_id is None:
+            pit_id = self.open_point_in_time(pit_keep_alive)
 
+        try:
+            yield from self._scan_pit(query, pit_id, batch_size, pit_keep_alive, metrics)
+        finally:
+            if owns_pit:
+                self.close_point_in_time(pit_id)
+
+    def _scan_pit(
+        self,
+        query: dict[str, Any],
+        pit_id: str,
+        batch_size: int,
+        pit_keep_alive: str,
+        metrics: OperationMetrics | None,
+    ) -> Generator[list[dict[str, Any]], None, None]:
         search_after: Any = None
-        prior_limit: int = query["size"]
+        # A size of 0 requests every hit
+        remaining: int | None = query["size"] or None
 
         while True:
-            query["size"] = (
-                batch_size
-                if prior_limit >= batch_size or prior_limit == 0
-                else prior_limit
-            )
+            size = batch_size if remaining is None else min(batch_size, remaining)
 
-            search_results: ObjectApiResponse[Any] = self.es.search(
-                **query,
+            search_results: ObjectApiResponse[Any] = self._search(
+                metrics,
+                "scan",
+                **{**query, "size": size},
                 pit={"id": pit_id, "keep_alive": pit_keep_alive},
                 search_after=search_after,
             )
@@ -221,11 +743,70 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
             if len(search_results["hits"]["hits"]) < batch_size:
                 break
 
+            if remaining is not None:
+                remaining -= size
+
+                if remaining <= 0:
+                    break
+
             search_after = search_results["hits"]["hits"][-1]["sort"]
             pit_id = search_results["pit_id"]
 
-            if prior_limit > 0:
-                prior_limit -= batch_size
+    def open_point_in_time(self, keep_alive: str = "1m") -> str:
+        pit_id: str = self._client("scan").open_point_in_time(
+            index=self.index_name, keep_alive=keep_alive
+        )["id"]
+        return pit_id
+
+    def close_point_in_time(self, pit_id: str) -> None:
+        try:
+            self._client("scan").close_point_in_time(id=pit_id)
+        except Exception as e:
+            # The point in time expires by itself after its keep alive
+            logger.warning(f"Failed to close point in time: {e}")
+
+    def query_aggregations(
+        self, query: dict[str, Any], operation: str = "query_aggregations"
+    ) -> dict[str, Any]:
+        """Sends a search request, such as one generated by a search query with other aggregations, and returns the aggregations of the response"""
+        with self._measure(operation) as metrics:
+            aggregations: dict[str, Any] = self._search(
+                metrics, **query, index=self.index_name
+            )["aggregations"]
+
+        return aggregations
+
+    def query_hits(
+        self,
+        query: dict[str, Any],
+        *,
+        batch_size: int = 10_000,
+        pit_id: str | None = None,
+        pit_keep_alive: str = "1m",
+        operation: str = "query_hits",
+    ) -> Generator[list[dict[str, Any]], None, None]:
+        """
+        Yields the raw hits of a search request, such as one generated by a search query, in batches.
+        Requests for at most 10.000 hits are sent as a single search, while larger ones, or requests for all hits with a size of 0, are paged through a point in time.
+        A `pit_id` can be given to share a point in time between scans, for example of different slices, which then has to be closed by the caller.
+        """
+        with self._measure(operation) as metrics:
+            if 0 < query["size"] <= 10_000 and pit_id is None:
+                hit_batches: Iterable[list[dict[str, Any]]] = [
+                    self._search(metrics, **query, index=self.index_name)["hits"]["hits"]
+                ]
+            else:
+                hit_batches = self._query_large(
+                    query,
+                    batch_size=batch_size,
+                    pit_id=pit_id,
+                    pit_keep_alive=pit_keep_alive,
+                    metrics=metrics,
+                )
+
+            for hits in hit_batches:
+                metrics.document_count += len(hits)
+                yield hits
 
     @overload
     def query_documents(
@@ -275,57 +856,227 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
         hits: list[dict[str, Any]] = []
         aggs: dict[str, Any] | None = None
 
-        if search_q.limit <= 10_000 and search_q.limit != 0:
-            search = self.es.search(
-                **search_q.generate_es_query(self.elser_model_id, completeness),
-                index=self.index_name,
-            )
+        with self._measure("query_documents") as metrics:
+            if search_q.limit <= 10_000 and search_q.limit != 0:
+                search = self._search(
+                    metrics,
+                    **search_q.generate_es_query(self.elser_model_id, completeness),
+                    index=self.index_name,
+                )
 
-            hits = search["hits"]["hits"]
+                hits = search["hits"]["hits"]
 
-            if "aggregations" in search:
-                aggs = search["aggregations"]
+                if "aggregations" in search:
+                    aggs = search_q.parse_aggregations(search["aggregations"])
 
-        else:
-            for hit_batch in self._query_large(
-                search_q.generate_es_query(self.elser_model_id, completeness)
-            ):
-                hits.extend(hit_batch)
+            else:
+                for hit_batch in self._query_large(
+                    search_q.generate_es_query(self.elser_model_id, completeness),
+                    metrics=metrics,
+                ):
+                    hits.extend(hit_batch)
 
-        if completeness is False:
-            p1: tuple[list[BaseDocument], list[dict[str, Any]]] = (
-                self._process_search_results(
-                    hits,
-                    lambda data: self.document_object_class["base"].model_validate(
-                        data
-                    ),
-                )
-            )
+            docs, invalid_docs = self.convert_hits(hits, completeness, metrics)
 
-            return (p1[0], p1[1], aggs)
-        elif completeness is True:
-            p2: tuple[list[FullDocument], list[dict[str, Any]]] = (
-                self._process_search_results(
-                    hits,
-                    lambda data: self.document_object_class["full"].model_validate(
-                        data
-                    ),
-                )
+        return docs, invalid_docs, aggs
+
+    def query_documents_as(
+        self,
+        search_q: SearchQueryType | None,
+        convert: Callable[[dict[str, Any]], AnyDocument],
+        exclude_fields: list[str] | None = None,
+    ) -> tuple[list[AnyDocument], list[dict[str, Any]]]:
+        """
+        Queries the full documents without the fields in `exclude_fields`, converted with `convert` instead of validated as full documents.
+        Used for document classes which load the excluded fields on their own, with documents which fail to convert returned as invalid.
+        """
+        if not search_q:
+            search_q = self.document_object_class["search_query"]()
+
+        query = search_q.generate_es_query(self.elser_model_id, True)
+
+        if exclude_fields:
+            query["source_excludes"] = query["source_excludes"] + exclude_fields
+
+        hits: list[dict[str, Any]] = []
+
+        with self._measure("query_documents_as") as metrics:
+            if search_q.limit <= 10_000 and search_q.limit != 0:
+                hits = self._search(metrics, **query, index=self.index_name)["hits"][
+                    "hits"
+                ]
+            else:
+                for hit_batch in self._query_large(query, metrics=metrics):
+                    hits.extend(hit_batch)
+
+            return self._process_search_results(hits, convert, metrics)
+
+    @overload
+    def query_documents_page(
+        self, search_q: SearchQueryType | None, completeness: Literal[False]
+    ) -> tuple[list[BaseDocument], list[dict[str, Any]], str | None]: ...
+
+    @overload
+    def query_documents_page(
+        self, search_q: SearchQueryType | None, completeness: Literal[True]
+    ) -> tuple[list[FullDocument], list[dict[str, Any]], str | None]: ...
+
+    @overload
+    def query_documents_page(
+        self, search_q: SearchQueryType | None, completeness: list[str]
+    ) -> tuple[list[PartialDocument], list[dict[str, Any]], str | None]: ...
+
+    @overload
+    def query_documents_page(
+        self, search_q: SearchQueryType | None, completeness: bool | list[str]
+    ) -> tuple[
+        list[BaseDocument] | list[PartialDocument] | list[FullDocument],
+        list[dict[str, Any]],
+        str | None,
+    ]: ...
+
+    def query_documents_page(
+        self,
+        search_q: SearchQueryType | None,
+        completeness: bool | list[str],
+    ) -> tuple[
+        list[BaseDocument] | list[PartialDocument] | list[FullDocument],
+        list[dict[str, Any]],
+        str | None,
+    ]:
+        """Returns a page of `search_q.limit` documents starting after `search_q.cursor`, along with the cursor for the next page, which is None once the results are exhausted"""
+        if not search_q:
+            search_q = self.document_object_class["search_query"](limit=10)
+
+        with self._measure("query_documents_page") as metrics:
+            search = self._search(
+                metrics,
+                **search_q.generate_paginated_es_query(
+                    self.elser_model_id, completeness, self.unique_field
+                ),
+                index=self.index_name,
             )
 
-            return (p2[0], p2[1], aggs)
-        elif isinstance(completeness, list):
-            p3: tuple[list[PartialDocument], list[dict[str, Any]]] = (
-                self._process_search_results(
-                    hits,
-                    lambda data: self.document_object_class["partial"].model_validate(
-                        data, context={"fields_to_validate": completeness}
-                    ),
-                )
+            hits: list[dict[str, Any]] = search["hits"]["hits"]
+
+            next_cursor = (
+                encode_cursor(hits[-1]["sort"]) if len(hits) == search_q.limit else None
             )
-            return (p3[0], p3[1], aggs)
-        else:
-            raise NotImplemented
+
+            docs, invalid_docs = self.convert_hits(hits, completeness, metrics)
+
+        return docs, invalid_docs, next_cursor
+
+    def query_facets(self, search_q: SearchQueryType) -> dict[str, dict[str, int]]:
+        """Returns only the facet counts for a query, which are cached independently of the hits"""
+        if not search_q.facets:
+            return {}
+
+        query = replace(search_q, limit=1, highlight=False, cursor=None).generate_es_query(
+            self.elser_model_id, False
+        )
+        query["size"] = 0
+
+        for key in ["sort", "highlight", "source_includes", "source_excludes"]:
+            query.pop(key, None)
+
+        cache_key = json.dumps(query, sort_keys=True, default=str)
+        facets = self.facet_cache.get(cache_key)
+
+        if facets is None:
+            with self._measure("query_facets") as metrics:
+                search = self._search(metrics, **query, index=self.index_name)
+                facets = search_q.parse_facets(search["aggregations"])
+                self.facet_cache.set(cache_key, facets)
+
+        return {facet: dict(counts) for facet, counts in facets.items()}
+
+    def query_date_histogram(
+        self,
+        search_q: SearchQueryType,
+        interval: str,
+        date_field: str | None = None,
+        split_field: str | None = None,
+        split_size: int = 10,
+    ) -> DateHistogram:
+        """
+        Counts the documents matching a query per time interval, optionally split into a series per value of `split_field`.
+        Every series is aligned with the returned timestamps, with empty intervals filled with 0.
+        """
+        date_field = date_field or search_q.date_field
+
+        if not date_field:
+            raise Exception("A date field is needed for creating a date histogram")
+
+        histogram: dict[str, Any] = {
+            "field": date_field,
+            "min_doc_count": 0,
+            (
+                "calendar_interval" if interval in CALENDAR_INTERVALS else "fixed_interval"
+            ): interval,
+        }
+
+        if date_field == search_q.date_field:
+            bounds = {
+                bound: date.isoformat()
+                for bound, date in [
+                    ("min", search_q.first_date),
+                    ("max", search_q.last_date),
+                ]
+                if date
+            }
+
+            if bounds:
+                histogram["extended_bounds"] = bounds
+
+        query = replace(
+            search_q,
+            limit=1,
+            highlight=False,
+            cursor=None,
+            facets=None,
+            aggregations=None,
+        ).generate_es_query(self.elser_model_id, False)
+
+        query["size"] = 0
+        query["aggs"] = {"histogram": {"date_histogram": histogram}}
+
+        if split_field:
+            query["aggs"]["split"] = {
+                "terms": {"field": split_field, "size": split_size},
+                "aggs": {"histogram": {"date_histogram": histogram}},
+            }
+
+        for key in ["sort", "highlight", "source_includes", "source_excludes"]:
+            query.pop(key, None)
+
+        with self._measure("query_date_histogram") as metrics:
+            aggregations = self._search(metrics, **query, index=self.index_name)[
+                "aggregations"
+            ]
+
+        buckets: list[dict[str, Any]] = aggregations["histogram"]["buckets"]
+        positions = {bucket["key"]: i for i, bucket in enumerate(buckets)}
+
+        series: dict[str, list[int]] = {}
+
+        for split in aggregations["split"]["buckets"] if split_field else []:
+            counts = [0] * len(buckets)
+
+            for bucket in split["histogram"]["buckets"]:
+                if bucket["key"] in positions:
+                    counts[positions[bucket["key"]]] = bucket["doc_count"]
+
+            series[str(split.get("key_as_string", split["key"]))] = counts
+
+        return {
+            "timestamps": [
+                datetime.fromtimestamp(bucket["key"] / 1000, timezone.utc)
+                for bucket in buckets
+            ],
+            "total": [bucket["doc_count"] for bucket in buckets],
+            "series": series,
+        }
 
     def scroll_documents(
         self,
@@ -336,15 +1087,116 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
         if not search_q:
             search_q = self.document_object_class["search_query"](limit=0)
 
-        for hits in self._query_large(
-            search_q.generate_es_query(self.elser_model_id, True),
-            pit_keep_alive=pit_keep_alive,
-            batch_size=batch_size,
-        ):
-            yield self._process_search_results(
-                hits,
-                lambda data: self.document_object_class["full"].model_validate(data),
-            )[0]
+        with self._measure("scroll_documents") as metrics:
+            for hits in self._query_large(
+                search_q.generate_es_query(self.elser_model_id, True),
+                pit_keep_alive=pit_keep_alive,
+                batch_size=batch_size,
+                metrics=metrics,
+            ):
+                yield self._process_search_results(
+                    hits,
+                    lambda data: self.document_object_class["full"].model_validate(
+                        data
+                    ),
+                    metrics,
+                )[0]
+
+    def _query_changes(
+        self,
+        search_q: SearchQueryType | None,
+        watermark: str | None,
+        field: str,
+        batch_size: int,
+        lag: float,
+        metrics: OperationMetrics | None = None,
+    ) -> Generator[tuple[list[dict[str, Any]], str], None, None]:
+        if not search_q:
+            search_q = self.document_object_class["search_query"](limit=0)
+
+        query = search_q.generate_es_query(self.elser_model_id, True)
+
+        for key in ["highlight", "aggs"]:
+            query.pop(key, None)
+
+        # The unique field makes the order total, so it's stable across requests without a point in time
+        query["size"] = batch_size
+        query["sort"] = [{field: "asc"}, {self.unique_field: "asc"}]
+
+        search_after: list[Any] | None = decode_cursor(watermark) if watermark else None
+
+        # Writes are stamped before they are indexed, so the latest ones are left for a later call, until the writes stamped before them are searchable
+        bounds: dict[str, Any] = {
+            "lte": int((time() - lag) * 1000),
+            "format": "epoch_millis",
+        }
+
+        if search_after:
+            bounds["gte"] = search_after[0]
+
+        query["query"]["bool"]["filter"].append({"range": {field: bounds}})
+
+        while True:
+            hits: list[dict[str, Any]] = self._search(
+                metrics,
+                "scan",
+                **query,
+                index=self.index_name,
+                search_after=search_after,
+            )["hits"]["hits"]
+
+            if not hits:
+                break
+
+            search_after = hits[-1]["sort"]
+            yield hits, encode_cursor(search_after)
+
+            if len(hits) < batch_size:
+                break
+
+    def query_change_hits(
+        self,
+        watermark: str | None = None,
+        search_q: SearchQueryType | None = None,
+        field: str = "updated_at",
+        batch_size: int = 1000,
+        lag: float = 300,
+    ) -> Generator[tuple[list[dict[str, Any]], str], None, None]:
+        """Like query_changes, but yields the raw search hits without validating them as documents"""
+        with self._measure("query_change_hits") as metrics:
+            for hits, next_watermark in self._query_changes(
+                search_q, watermark, field, batch_size, lag, metrics
+            ):
+                metrics.document_count += len(hits)
+                yield hits, next_watermark
+
+    def query_changes(
+        self,
+        watermark: str | None = None,
+        search_q: SearchQueryType | None = None,
+        field: str = "updated_at",
+        batch_size: int = 1000,
+        lag: float = 300,
+    ) -> Generator[tuple[list[FullDocument], str], None, None]:
+        """
+        Yields batches of the documents where the date in `field` is newer than the watermark, oldest first, along with the watermark to persist once the batch is processed.
+        Without a watermark every document is returned. Documents indexed with a date older than the watermark won't be picked up.
+        The default updated_at field is stamped by every write, but before it's indexed, so writes from the last `lag` seconds are left for a later call, and it should be longer than a write can take.
+        Indices created before updated_at was introduced need to be migrated with migrate_index first.
+        """
+        with self._measure("query_changes") as metrics:
+            for hits, next_watermark in self._query_changes(
+                search_q, watermark, field, batch_size, lag, metrics
+            ):
+                docs = self._process_search_results(
+                    hits,
+                    lambda data: self.document_object_class["full"].model_validate(
+                        data
+                    ),
+                    metrics,
+                )[0]
+
+                yield docs, next_watermark
 
     def query_all_documents(self) -> list[FullDocument]:
         return self.query_documents(
@@ -358,15 +1210,126 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
 
     # If there's more than 10.000 unique values, then this function will only get the first 10.000
     def get_unique_values(self, field_name: str) -> dict[str, int]:
-        unique_vals = self.es.search(
-            size=0,
-            aggs={"unique_fields": {"terms": {"field": field_name, "size": 10_000}}},
-        )["aggregations"]["unique_fields"]["buckets"]
+        with self._measure("get_unique_values") as metrics:
+            unique_vals = self._search(
+                metrics,
+                size=0,
+                aggs={"unique_fields": {"terms": {"field": field_name, "size": 10_000}}},
+            )["aggregations"]["unique_fields"]["buckets"]
 
         return {
             unique_val["key"]: unique_val["doc_count"] for unique_val in unique_vals
         }
 
+    def get_sources(self, ids: list[str], fields: list[str]) -> dict[str, dict[str, Any]]:
+        """Fetches only the given fields of the documents with a single multi get, leaving out documents which doesn't exist"""
+        if not ids:
+            return {}
+
+        with self._measure("get_sources") as metrics:
+            response = self._client("search").mget(
+                index=self.index_name, ids=ids, source_includes=fields
+            )
+            metrics.record_response(response)
+
+            docs: list[dict[str, Any]] = response["docs"]
+            metrics.document_count = len(docs)
+
+        return {doc["_id"]: doc.get("_source", {}) for doc in docs if doc.get("found")}
+
+    @overload
+    def get_documents(
+        self, ids: Sequence[str], completeness: Literal[False], batch_size: int = ...
+    ) -> tuple[list[BaseDocument], list[dict[str, Any]]]: ...
+
+    @overload
+    def get_documents(
+        self, ids: Sequence[str], completeness: Literal[True], batch_size: int = ...
+    ) -> tuple[list[FullDocument], list[dict[str, Any]]]: ...
+
+    @overload
+    def get_documents(
+        self, ids: Sequence[str], completeness: list[str], batch_size: int = ...
+    ) -> tuple[list[PartialDocument], list[dict[str, Any]]]: ...
+
+    @overload
+    def get_documents(
+        self,
+        ids: Sequence[str],
+        completeness: bool | list[str],
+        batch_size: int = ...,
+    ) -> tuple[
+        list[BaseDocument] | list[PartialDocument] | list[FullDocument],
+        list[dict[str, Any]],
+    ]: ...
+
+    def get_documents(
+        self,
+        ids: Sequence[str],
+        completeness: bool | list[str],
+        batch_size: int = 1000,
+    ) -> tuple[
+        list[BaseDocument] | list[PartialDocument] | list[FullDocument],
+        list[dict[str, Any]],
+    ]:
+        """
+        Looks up documents by ID with multi gets of `batch_size` documents, returning them in the order of `ids` while leaving out IDs which doesn't exist.
+        Sources are read through the document cache, which writes through this client invalidates.
+        """
+        search_query_class = self.document_object_class["search_query"]
+
+        includes: list[str] | None = None
+
+        if completeness is False:
+            includes = search_query_class.essential_fields
+        elif isinstance(completeness, list):
+            includes = completeness
+
+        fields = frozenset(includes) if includes is not None else None
+
+        sources: dict[str, dict[str, Any]] = {}
+        missing: list[str] = []
+
+        for id in dict.fromkeys(ids):
+            cached = self.document_cache.get(id, fields)
+
+            if cached is None:
+                missing.append(id)
+            else:
+                sources[id] = cached
+
+        with self._measure("get_documents") as metrics:
+            for batch in itertools.batched(missing, batch_size):
+                response = self._client("search").mget(
+                    index=self.index_name,
+                    ids=list(batch),
+                    source_includes=includes,
+                    source_excludes=search_query_class.exclude_fields,
+                )
+                metrics.record_response(response)
+
+                for doc in response["docs"]:
+                    if not doc.get("found"):
+                        continue
+
+                    self.document_cache.add(
+                        doc["_id"],
+                        doc["_seq_no"],
+                        doc["_primary_term"],
+                        doc["_source"],
+                        fields,
+                    )
+                    sources[doc["_id"]] = doc["_source"]
+
+            metrics.document_count = len(sources)
+
+            # Validation adds the ID to the source, so the cached sources are copied
+            hits = [
+                {"_id": id, "_source": dict(sources[id])} for id in ids if id in sources
+            ]
+
+            return self.convert_hits(hits, completeness, metrics)
+
     def update_documents(
         self,
         documents: Sequence[FullDocument] | Sequence[PartialDocument],
@@ -374,7 +1337,28 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
         use_pipeline: bool = False,
         use_pre_pipelines: bool = False,
         chunk_size: int = 500,
+        skip_unchanged: bool = False,
+        stored_hashes: dict[str, dict[str, str]] | None = None,
     ) -> int:
+        """
+        Updates the documents, returning the number of updated documents.
+        With `skip_unchanged`, the stored content hashes are compared first, so hashed fields last written with the same value and pipelines aren't sent, and the pipelines reading them doesn't run again.
+        The hashes are fetched before the update, unless the caller already has them and gives them in `stored_hashes` by document ID, like the content_hashes field in the sources from get_sources.
+        Documents without any changed fields to send are skipped entirely.
+        """
+        if skip_unchanged and self.hash_fields and stored_hashes is None:
+            stored_hashes = {}
+
+            for id_batch in itertools.batched([doc.id for doc in documents], 1000):
+                stored_hashes.update(
+                    {
+                        id: source.get("content_hashes", {})
+                        for id, source in self.get_sources(
+                            list(id_batch), ["content_hashes"]
+                        ).items()
+                    }
+                )
+
         func_call = functools.partial(
             create_document_update_operation,
             index_name=self.index_name,
@@ -382,11 +1366,26 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
             elser_model_id=self.elser_model_id,
             pipeline=self.ingest_pipeline if use_pipeline else None,
             pre_pipelines=self.pre_pipelines if use_pre_pipelines else None,
+            hash_signatures=self.hash_signatures(use_pipeline, use_pre_pipelines),
+            stored_hashes=stored_hashes if skip_unchanged else None,
+            pipeline_input_fields=self.pipeline_input_fields,
         )
 
-        with multiprocessing.Pool(multiprocessing.cpu_count() - 2) as pool:
-            operations = pool.imap_unordered(func_call, documents, 2000)
-            return bulk(self.es, operations, chunk_size=chunk_size)[0]
+        with (
+            self._measure("update_documents") as metrics,
+            multiprocessing.Pool(max(multiprocessing.cpu_count() - 2, 1)) as pool,
+        ):
+            operations = pool.imap_unordered(
+                functools.partial(create_timed_operation, func_call), documents, 2000
+            )
+            return self._bulk(
+                (
+                    operation
+                    for operation in self._collect_stage_timings(operations, metrics)
+                    if operation["doc"]
+                ),
+                chunk_size=chunk_size,
+            )
 
     def save_documents(
         self,
@@ -401,11 +1400,204 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
             elser_model_id=self.elser_model_id,
             pipeline=self.ingest_pipeline if use_pipeline else None,
             pre_pipelines=self.pre_pipelines if use_pre_pipelines else None,
+            hash_signatures=self.hash_signatures(use_pipeline, use_pre_pipelines),
         )
 
-        with multiprocessing.Pool(multiprocessing.cpu_count() - 2) as pool:
-            operations = pool.imap_unordered(func_call, documents, 2000)
-            return bulk(self.es, operations, chunk_size=chunk_size)[0]
+        timed_call = functools.partial(create_timed_operation, func_call)
+
+        with (
+            self._measure("save_documents") as metrics,
+            multiprocessing.Pool(max(multiprocessing.cpu_count() - 2, 1)) as pool,
+        ):
+            if not self.duplicate_index:
+                operations = pool.imap_unordered(timed_call, documents, 2000)
+                return self._bulk(
+                    self._collect_stage_timings(operations, metrics),
+                    chunk_size=chunk_size,
+                )
+
+            start = perf_counter()
+            unique_documents = self._filter_near_duplicates(documents, pool)
+            metrics.record_stages({"near_duplicates": perf_counter() - start})
+
+            try:
+                operations = pool.imap_unordered(timed_call, unique_documents, 2000)
+                saved = self._bulk(
+                    self._collect_stage_timings(operations, metrics),
+                    chunk_size=chunk_size,
+                )
+            except:
+                for doc in unique_documents:
+                    self.duplicate_index.remove(doc.id)
+                raise
+
+            self.duplicate_index.save()
+            return saved
+
+    def create_documents(
+        self,
+        documents: Sequence[FullDocument],
+        use_pipeline: bool = True,
+        use_pre_pipelines: bool = True,
+        chunk_size: int = 5,
+        check_existing: bool = False,
+    ) -> IngestResult:
+        """
+        Ingests documents which aren't already present, with IDs derived from their unique field and bulk create operations.
+        Documents whose ID already exists are reported as existing instead of failing, which makes it safe to ingest the same documents concurrently without checking for them first.
+        Documents left out as near-duplicates of indexed ones are reported as duplicates.
+
+        This relies on every document in the index having the ID derived from its unique field, which isn't the case for documents saved with save_documents, as they keep the ID they were given.
+        Indices containing such documents are migrated by creating a new index, ingesting the documents from scroll_documents into it with this method, and pointing the index alias to it. As the embeddings aren't read back, the pipelines have to run again.
+        Until then, `check_existing` searches for the unique field first, and reports documents present under another ID as existing with that ID.
+        """
+        documents = [
+            doc.model_copy(
+                update={"id": deterministic_id(str(getattr(doc, self.unique_field)))}
+            )
+            for doc in documents
+        ]
+
+        func_call = functools.partial(
+            create_document_create_operation,
+            index_name=self.index_name,
+            elser_model_id=self.elser_model_id,
+            pipeline=self.ingest_pipeline if use_pipeline else None,
+            pre_pipelines=self.pre_pipelines if use_pre_pipelines else None,
+            hash_signatures=self.hash_signatures(use_pipeline, use_pre_pipelines),
+        )
+
+        result = IngestResult(created=[], existing=[], failed={}, duplicates={})
+
+        with (
+            self._measure("create_documents") as metrics,
+            multiprocessing.Pool(max(multiprocessing.cpu_count() - 2, 1)) as pool,
+        ):
+            if check_existing:
+                start = perf_counter()
+                existing_ids = self._existing_ids(
+                    [str(getattr(doc, self.unique_field)) for doc in documents], metrics
+                )
+                metrics.record_stages({"check_existing": perf_counter() - start})
+
+                new_documents: list[FullDocument] = []
+
+                for doc in documents:
+                    unique_value = str(getattr(doc, self.unique_field))
+
+                    if unique_value in existing_ids:
+                        result.existing.append(existing_ids[unique_value])
+                    else:
+                        new_documents.append(doc)
+
+                documents = new_documents
+
+            if self.duplicate_index:
+                start = perf_counter()
+                documents = self._filter_near_duplicates(
+                    documents, pool, result.duplicates
+                )
+                metrics.record_stages({"near_duplicates": perf_counter() - start})
+
+            operations = pool.imap_unordered(
+                functools.partial(create_timed_operation, func_call), documents, 2000
+            )
+
+            try:
+                for ok, item in streaming_bulk(
+                    self._client("bulk"),
+                    self._collect_stage_timings(operations, metrics),
+                    chunk_size=chunk_size,
+                    raise_on_error=False,
+                ):
+                    response = item["create"]
+
+                    if ok:
+                        self.document_cache.invalidate(
+                            response["_id"], response["_seq_no"], response["_primary_term"]
+                        )
+                        result.created.append(response["_id"])
+                    elif response.get("status") == 409:
+                        result.existing.append(response["_id"])
+                    else:
+                        result.failed[response["_id"]] = str(
+                            response.get("error", {}).get("reason", response.get("error"))
+                        )
+            except:
+                if self.duplicate_index:
+                    for doc in documents:
+                        self.duplicate_index.remove(doc.id)
+                raise
+
+            if self.duplicate_index:
+                # Existing documents are already part of the index from when they were created
+                for id in result.failed:
+                    self.duplicate_index.remove(id)
+
+                self.duplicate_index.save()
+
+        if result.failed:
+            logger.error(
+                f'Failed to create {len(result.failed)} documents in "{self.index_name}"'
+            )
+
+        return result
+
+    def _filter_near_duplicates(
+        self,
+        documents: Sequence[FullDocument],
+        pool: multiprocessing.pool.Pool,
+        duplicates: dict[str, str] | None = None,
+    ) -> list[FullDocument]:
+        """
+        Drops new documents which are near-duplicates of already indexed ones, and adds the IDs of similar documents to the similar field where present.
+        The dropped documents are added to `duplicates`, with the ID of the document they duplicate.
+        """
+        if not self.duplicate_index:
+            return list(documents)
+
+        index = self.duplicate_index
+
+        signatures = pool.map(
+            index.hasher.signature,
+            [getattr(doc, index.text_field, None) or "" for doc in documents],
+            200,
+        )
+
+        unique_documents: list[FullDocument] = []
+
+        for doc, signature in zip(documents, signatures):
+            matches = [match for match in index.query(signature) if match[0] != doc.id]
+
+            # Documents which are already indexed are being saved again, and are kept even if other documents are near-duplicates of them
+            if (
+                matches
+                and matches[0][1] >= index.duplicate_threshold
+                and doc.id not in index.signatures
+            ):
+                logger.info(
+                    f'Skipping document with ID "{doc.id}", as it is a near-duplicate of document with ID "{matches[0][0]}"'
+                )
+
+                if duplicates is not None:
+                    duplicates[doc.id] = matches[0][0]
+
+                continue
+
+            if matches and "similar" in type(doc).model_fields:
+                similar: list[str] = getattr(doc, "similar")
+                doc = doc.model_copy(
+                    update={
+                        "similar": list(
+                            dict.fromkeys([*similar, *[id for id, _ in matches]])
+                        )
+                    }
+                )
+
+            index.add(doc.id, signature)
+            unique_documents.append(doc)
+
+        return unique_documents
 
     def save_document(
         self,
@@ -413,22 +1605,34 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
         use_pipeline: bool = True,
         use_pre_pipelines: bool = True,
     ) -> str:
-        operation = create_document_operation(
-            doc,
-            self.index_name,
-            self.elser_model_id,
-            self.ingest_pipeline if use_pipeline else None,
-            self.pre_pipelines if use_pre_pipelines else None,
-        )
+        with self._measure("save_document") as metrics:
+            stage_timings: dict[str, float] = {}
+
+            operation = create_document_operation(
+                doc,
+                self.index_name,
+                self.elser_model_id,
+                self.ingest_pipeline if use_pipeline else None,
+                self.pre_pipelines if use_pre_pipelines else None,
+                stage_timings,
+                hash_signatures=self.hash_signatures(use_pipeline, use_pre_pipelines),
+            )
 
-        response = self.es.index(
-            index=operation["_index"],
-            pipeline=operation["pipeline"] if "pipeline" in operation else None,
-            document=operation["_source"],
-            id=operation["_id"],
-        )["_id"]
+            metrics.document_count = 1
+            metrics.record_stages(stage_timings)
 
-        return cast(str, response)
+            response = self._client("write").index(
+                index=operation["_index"],
+                pipeline=operation["pipeline"] if "pipeline" in operation else None,
+                document=operation["_source"],
+                id=operation["_id"],
+            )
+
+        self.document_cache.invalidate(
+            response["_id"], response["_seq_no"], response["_primary_term"]
+        )
+
+        return cast(str, response["_id"])
 
     def delete_document(self, ids: Set[str]) -> int:
         def gen_actions(ids: Set[str]) -> Generator[dict[str, Any], None, None]:
@@ -439,11 +1643,33 @@ class ElasticDB(Generic[BaseDocument, PartialDocument, FullDocument, SearchQuery
                     "_id": id,
                 }
 
-        return bulk(self.es, gen_actions(ids))[0]
+        with self._measure("delete_document") as metrics:
+            metrics.document_count = len(ids)
+            deleted = self._bulk(gen_actions(ids))
+
+        if self.duplicate_index:
+            for id in ids:
+                self.duplicate_index.remove(id)
+
+            self.duplicate_index.save()
+
+        return deleted
 
     def increment_read_counter(self, document_id: str) -> None:
-        increment_script = {"source": "ctx._source.read_times += 1", "lang": "painless"}
-        self.es.update(index=self.index_name, id=document_id, script=increment_script)
+        increment_script = {
+            "source": "ctx._source.read_times += 1; ctx._source.updated_at = params.updated_at",
+            "lang": "painless",
+            "params": {"updated_at": update_timestamp()},
+        }
+
+        with self._measure("increment_read_counter"):
+            response = self._client("write").update(
+                index=self.index_name, id=document_id, script=increment_script
+            )
+
+        self.document_cache.invalidate(
+            document_id, response.get("_seq_no"), response.get("_primary_term")
+        )
 
     def await_task(
         self,
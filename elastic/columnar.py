@@ -0,0 +1,250 @@
+from collections.abc import Iterable
+from datetime import datetime
+import types
+from typing import Annotated, Any, Literal, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from ..objects import FullArticle, FullCluster, FullCVE
+from .client import ElasticDB
+from .configs import ES_INDEX_CONFIGS
+from .queries import SearchQuery
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ColumnarFormat = Literal["parquet", "arrow"]
+
+# Embeddings are only useful inside Elasticsearch, and are large
+DEFAULT_EXCLUDED_COLUMNS = ["embeddings"]
+
+INDEX_CONFIG_BY_DOCUMENT: dict[type[BaseModel], str] = {
+    FullArticle: "ELASTICSEARCH_ARTICLE_INDEX",
+    FullCluster: "ELASTICSEARCH_CLUSTER_INDEX",
+    FullCVE: "ELASTICSEARCH_CVE_INDEX",
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Columnar exports requires pyarrow to be installed")
+
+
+def index_mapping(client: ElasticDB[Any, Any, Any, Any]) -> dict[str, Any]:
+    document_class = client.document_object_class["full"]
+
+    if document_class not in INDEX_CONFIG_BY_DOCUMENT:
+        raise Exception(
+            f'No index mapping is known for "{document_class.__name__}", please provide one'
+        )
+
+    return ES_INDEX_CONFIGS[INDEX_CONFIG_BY_DOCUMENT[document_class]]
+
+
+def _arrow_type(es_type: str) -> "pa.DataType | None":
+    return {
+        "keyword": pa.string(),
+        "text": pa.string(),
+        "date": pa.timestamp("ms", tz="UTC"),
+        "boolean": pa.bool_(),
+        "integer": pa.int32(),
+        "long": pa.int64(),
+        "unsigned_long": pa.uint64(),
+        "float": pa.float32(),
+        # Parquet has limited support for half precision floats
+        "half_float": pa.float32(),
+        "double": pa.float64(),
+    }.get(es_type)
+
+
+def _unwrap_annotation(annotation: Any) -> tuple[int, Any]:
+    """Returns how many lists the annotation is nested in, along with the inner type"""
+    origin = get_origin(annotation)
+
+    if origin is Annotated:
+        return _unwrap_annotation(get_args(annotation)[0])
+
+    if origin in (Union, types.UnionType):
+        candidates = [
+            _unwrap_annotation(arg)
+            for arg in get_args(annotation)
+            if arg is not type(None)
+        ]
+        return max(candidates, key=lambda candidate: candidate[0])
+
+    if origin in (list, set, frozenset, tuple):
+        depth, inner = _unwrap_annotation(get_args(annotation)[0])
+        return depth + 1, inner
+
+    return 0, annotation
+
+
+def list_depths(model: type[BaseModel], prefix: str = "") -> dict[str, int]:
+    """Maps the dotted path of every leaf field in the model to the number of lists it is nested in"""
+    depths: dict[str, int] = {}
+
+    for name, field in model.model_fields.items():
+        depth, inner = _unwrap_annotation(field.annotation)
+        path = f"{prefix}{name}"
+
+        if isinstance(inner, type) and issubclass(inner, BaseModel):
+            for sub_path, sub_depth in list_depths(inner, f"{path}.").items():
+                depths[sub_path] = depth + sub_depth
+        else:
+            depths[path] = depth
+
+    return depths
+
+
+def _leaf_fields(
+    properties: dict[str, Any], prefix: str = ""
+) -> Iterable[tuple[str, str]]:
+    for name, mapping in properties.items():
+        path = f"{prefix}{name}"
+
+        if "properties" in mapping and mapping.get("type") != "nested":
+            yield from _leaf_fields(mapping["properties"], f"{path}.")
+        elif "type" in mapping:
+            yield path, mapping["type"]
+
+
+def _selected(path: str, columns: list[str] | None, exclude: list[str]) -> bool:
+    def matches(column: str) -> bool:
+        return path == column or path.startswith(f"{column}.")
+
+    if any(matches(column) for column in exclude):
+        return False
+
+    return columns is None or any(matches(column) for column in columns)
+
+
+def index_schema(
+    mapping: dict[str, Any],
+    document_class: type[BaseModel],
+    columns: list[str] | None = None,
+    exclude: list[str] | None = None,
+) -> "pa.Schema":
+    """
+    Creates an Arrow schema with a column per leaf field in the index mapping, named by the dotted path of the field.
+    As mappings doesn't distinguish single values from arrays, the document class decides which columns are lists.
+    """
+    _require_pyarrow()
+
+    exclude = DEFAULT_EXCLUDED_COLUMNS if exclude is None else exclude
+    depths = list_depths(document_class)
+
+    fields = [pa.field("id", pa.string(), nullable=False)]
+
+    for path, es_type in _leaf_fields(mapping["properties"]):
+        arrow_type = _arrow_type(es_type)
+
+        if arrow_type is None or not _selected(path, columns, exclude):
+            continue
+
+        for _ in range(depths.get(path, 0)):
+            arrow_type = pa.list_(arrow_type)
+
+        fields.append(pa.field(path, arrow_type))
+
+    return pa.schema(fields)
+
+
+def _extract(value: Any, keys: list[str], convert_date: bool) -> Any:
+    if value is None:
+        return None
+
+    if isinstance(value, list):
+        return [_extract(item, keys, convert_date) for item in value]
+
+    if keys:
+        return (
+            _extract(value.get(keys[0]), keys[1:], convert_date)
+            if isinstance(value, dict)
+            else None
+        )
+
+    return datetime.fromisoformat(value) if convert_date and isinstance(value, str) else value
+
+
+def hits_to_record_batch(
+    hits: list[dict[str, Any]], schema: "pa.Schema"
+) -> "pa.RecordBatch":
+    arrays = [pa.array([hit["_id"] for hit in hits], pa.string())]
+
+    for field in schema:
+        if field.name == "id":
+            continue
+
+        leaf_type = field.type
+
+        while pa.types.is_list(leaf_type):
+            leaf_type = leaf_type.value_type
+
+        keys = field.name.split(".")
+        convert_date = pa.types.is_timestamp(leaf_type)
+
+        arrays.append(
+            pa.array(
+                [_extract(hit["_source"], keys, convert_date) for hit in hits],
+                field.type,
+            )
+        )
+
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_index(
+    client: ElasticDB[Any, Any, Any, Any],
+    destination: str,
+    format: ColumnarFormat = "parquet",
+    search_q: SearchQuery | None = None,
+    columns: list[str] | None = None,
+    exclude: list[str] | None = None,
+    mapping: dict[str, Any] | None = None,
+    batch_size: int = 10_000,
+) -> int:
+    """
+    Streams the documents matching the query into a Parquet or Arrow IPC file, one record batch per page of results.
+    Nested objects are flattened into columns named by their dotted path, and `columns` or `exclude` limits which are exported, by path or path prefix.
+    Arrow IPC files can be memory mapped when read. Returns the number of exported documents.
+    """
+    _require_pyarrow()
+
+    schema = index_schema(
+        mapping or index_mapping(client),
+        client.document_object_class["full"],
+        columns,
+        exclude,
+    ).with_metadata(
+        {"index": client.index_name, "exported_at": datetime.now().astimezone().isoformat()}
+    )
+
+    if not search_q:
+        search_q = client.document_object_class["search_query"](limit=0)
+
+    query = search_q.generate_es_query(client.elser_model_id, True)
+    query["source_includes"] = [field.name for field in schema if field.name != "id"]
+
+    for key in ["source_excludes", "highlight"]:
+        query.pop(key, None)
+
+    writer: pq.ParquetWriter | pa.ipc.RecordBatchFileWriter = (
+        pq.ParquetWriter(destination, schema, compression="zstd")
+        if format == "parquet"
+        else pa.ipc.new_file(destination, schema)
+    )
+
+    exported = 0
+
+    with writer:
+        for hits in client.query_hits(
+            query, batch_size=batch_size, operation="export_index"
+        ):
+            if hits:
+                writer.write_batch(hits_to_record_batch(hits, schema))
+                exported += len(hits)
+
+    return exported
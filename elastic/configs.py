@@ -28,6 +28,8 @@ ES_INDEX_CONFIGS: dict[str, dict[str, dict[str, Any]]] = {
             "image_url": {"type": "keyword"},
             "author": {"type": "keyword"},
             "inserted_at": {"type": "date"},
+            # The time of the last write, which the change feed follows
+            "updated_at": {"type": "date"},
             "publish_date": {"type": "date"},
             "read_times": {"type": "unsigned_long"},
             "tags": {
@@ -78,6 +80,8 @@ ES_INDEX_CONFIGS: dict[str, dict[str, dict[str, Any]]] = {
                     },
                 }
             },
+            # Hashes of the fields read by the pipelines, which are only used for detecting changes. Existing indices get it from migrate_index
+            "content_hashes": {"type": "object", "enabled": False},
         },
     },
     "ELASTICSEARCH_CLUSTER_INDEX": {
@@ -90,6 +94,7 @@ ES_INDEX_CONFIGS: dict[str, dict[str, dict[str, Any]]] = {
             "keywords": {"type": "keyword"},
             "documents": {"type": "keyword"},
             "dating": {"type": "date"},
+            "updated_at": {"type": "date"},
         },
     },
     "ELASTICSEARCH_CVE_INDEX": {
@@ -166,6 +171,7 @@ ES_INDEX_CONFIGS: dict[str, dict[str, dict[str, Any]]] = {
             "keywords": {"type": "keyword"},
             "documents": {"type": "keyword"},
             "dating": {"type": "date"},
+            "updated_at": {"type": "date"},
         },
     },
 }
@@ -0,0 +1,214 @@
+from array import array
+from dataclasses import dataclass, field
+import os
+import pickle
+import random
+import re
+import zlib
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SIGNATURE_ITEM_SIZE = array("Q").itemsize
+
+
+def shingle_hashes(text: str, shingle_size: int) -> set[int]:
+    words = re.findall(r"\w+", text.lower())
+
+    if len(words) <= shingle_size:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+
+    return {
+        zlib.crc32(" ".join(words[i : i + shingle_size]).encode())
+        for i in range(len(words) - shingle_size + 1)
+    }
+
+
+# Needs to be picklable, as signatures are calculated in the multiprocessing pool
+@dataclass(frozen=True)
+class MinHasher:
+    num_perm: int = 128
+    shingle_size: int = 5
+    seed: int = 1
+
+    permutations: tuple[tuple[int, int], ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        generator = random.Random(self.seed)
+
+        object.__setattr__(
+            self,
+            "permutations",
+            tuple(
+                (
+                    generator.randint(1, MERSENNE_PRIME - 1),
+                    generator.randint(0, MERSENNE_PRIME - 1),
+                )
+                for _ in range(self.num_perm)
+            ),
+        )
+
+    def signature(self, text: str) -> bytes:
+        """Returns the MinHash signature packed as unsigned 64-bit integers, which is far smaller to hold and pickle than a tuple of ints"""
+        hashes = shingle_hashes(text, self.shingle_size)
+
+        if not hashes:
+            return b""
+
+        return array(
+            "Q",
+            (
+                min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+                for a, b in self.permutations
+            ),
+        ).tobytes()
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of document texts, bucketed with locality sensitive hashing so near-duplicates can be found without pairwise comparisons.
+    The signatures are persisted to `path`, while the LSH buckets are rebuilt when loading.
+    """
+
+    def __init__(
+        self,
+        path: str | None,
+        text_field: str = "content",
+        similar_threshold: float = 0.5,
+        duplicate_threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+    ) -> None:
+        if num_perm % bands != 0:
+            raise Exception("The number of permutations has to be divisible by the number of bands")
+
+        self.path = path
+        self.text_field = text_field
+        self.similar_threshold = similar_threshold
+        self.duplicate_threshold = duplicate_threshold
+
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self.signatures: dict[str, bytes] = {}
+        # Band keys are hashed into ints, and buckets with a single document holds its ID instead of a set
+        self.buckets: dict[int, str | set[str]] = {}
+
+        if path and os.path.isfile(path):
+            self.load()
+
+    def _band_keys(self, signature: bytes) -> list[int]:
+        band_size = self.rows * SIGNATURE_ITEM_SIZE
+
+        return [
+            hash((band, signature[band * band_size : (band + 1) * band_size]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, id: str, signature: bytes) -> None:
+        if not signature:
+            return
+
+        self.remove(id)
+        self.signatures[id] = signature
+
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+
+            if bucket is None:
+                self.buckets[key] = id
+            elif isinstance(bucket, str):
+                if bucket != id:
+                    self.buckets[key] = {bucket, id}
+            else:
+                bucket.add(id)
+
+    def remove(self, id: str) -> None:
+        signature = self.signatures.pop(id, None)
+
+        if not signature:
+            return
+
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+
+            if bucket is None:
+                continue
+
+            if isinstance(bucket, str):
+                if bucket == id:
+                    del self.buckets[key]
+                continue
+
+            bucket.discard(id)
+
+            if len(bucket) == 1:
+                self.buckets[key] = next(iter(bucket))
+
+    def query(self, signature: bytes) -> list[tuple[str, float]]:
+        """Returns the IDs and estimated similarity of documents at or above the similar threshold, most similar first"""
+        if not signature:
+            return []
+
+        candidates: set[str] = set()
+
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+
+            if isinstance(bucket, str):
+                candidates.add(bucket)
+            elif bucket:
+                candidates.update(bucket)
+
+        values = array("Q", signature)
+        matches: list[tuple[str, float]] = []
+
+        for candidate in candidates:
+            similarity = sum(
+                a == b for a, b in zip(values, array("Q", self.signatures[candidate]))
+            ) / len(values)
+
+            if similarity >= self.similar_threshold:
+                matches.append((candidate, similarity))
+
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def load(self) -> None:
+        if not self.path:
+            return
+
+        with open(self.path, "rb") as f:
+            data = pickle.load(f)
+
+        if (data["num_perm"], data["shingle_size"], data["seed"]) != (
+            self.hasher.num_perm,
+            self.hasher.shingle_size,
+            self.hasher.seed,
+        ):
+            raise Exception(
+                f'The near-duplicate index at "{self.path}" was created with different hashing parameters'
+            )
+
+        self.signatures = {}
+        self.buckets.clear()
+
+        for id, signature in data["signatures"].items():
+            self.add(id, signature)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+
+        data = {
+            "num_perm": self.hasher.num_perm,
+            "shingle_size": self.hasher.shingle_size,
+            "seed": self.hasher.seed,
+            "signatures": self.signatures,
+        }
+
+        # Writing to a temporary file first, to avoid corrupting the index if interrupted
+        with open(f"{self.path}.tmp", "wb") as f:
+            pickle.dump(data, f)
+
+        os.replace(f"{self.path}.tmp", self.path)
@@ -1,4 +1,6 @@
+from dataclasses import dataclass
 from typing import Any
+from elastic_transport import BaseNode
 from elasticsearch import Elasticsearch
 from transformers import BertTokenizer
 
@@ -13,8 +15,10 @@ from ..objects import (
     FullCVE,
     PartialCVE,
 )
-from .client import ElasticDB, PrePipeline
+from .client import ElasticDB, PrePipeline, RequestTimeouts
+from .duplicates import NearDuplicateIndex
 from .queries import ArticleSearchQuery, CVESearchQuery, ClusterSearchQuery
+from .serializers import fast_serializers
 
 bert_tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
 
@@ -51,15 +55,67 @@ def chunk_for_elser(doc: dict[str, Any]) -> dict[str, Any]:
     return doc
 
 
+@dataclass(frozen=True)
+class ConnectionOptions:
+    """
+    Options for the connection pool of the Elasticsearch client.
+    Connections to each node are kept alive and reused, up to `connections_per_node` concurrent ones.
+    Nodes failing a request are marked dead and retried after a backoff growing with `dead_node_backoff_factor` up to `max_dead_node_backoff` seconds.
+    Timed out requests aren't retried by default, as writes might already have been applied. ElasticDB enables it for its reads.
+    """
+
+    request_timeout: float = 30
+    connections_per_node: int = 10
+    http_compress: bool = False
+    sniff: bool = False
+    min_delay_between_sniffing: float = 60
+    dead_node_backoff_factor: float = 1
+    max_dead_node_backoff: float = 30
+    max_retries: int = 3
+    retry_on_timeout: bool = False
+
+
 def create_es_conn(
-    addresses: str | list[str], verify_certs: bool, cert_path: None | str = None
+    addresses: str | list[str],
+    verify_certs: bool,
+    cert_path: None | str = None,
+    node_class: type[BaseNode] | None = None,
+    fast_serialization: bool = True,
+    options: ConnectionOptions | None = None,
 ) -> Elasticsearch:
-    if cert_path:
-        return Elasticsearch(
-            addresses, ca_certs=cert_path, verify_certs=verify_certs, timeout=30
+    """Creates a client balancing requests between the given nodes, and optionally the nodes discovered by sniffing"""
+    options = options or ConnectionOptions()
+
+    client_options: dict[str, Any] = {
+        "request_timeout": options.request_timeout,
+        "connections_per_node": options.connections_per_node,
+        "http_compress": options.http_compress,
+        "dead_node_backoff_factor": options.dead_node_backoff_factor,
+        "max_dead_node_backoff": options.max_dead_node_backoff,
+        "max_retries": options.max_retries,
+        "retry_on_timeout": options.retry_on_timeout,
+    }
+
+    if options.sniff:
+        client_options.update(
+            {
+                "sniff_on_start": True,
+                "sniff_on_node_failure": True,
+                "min_delay_between_sniffing": options.min_delay_between_sniffing,
+            }
         )
-    else:
-        return Elasticsearch(addresses, verify_certs=verify_certs, timeout=30)
+
+    # Allows swapping the HTTP layer, for example with the InMemoryNode for testing
+    if node_class:
+        client_options["node_class"] = node_class
+
+    if fast_serialization and (serializers := fast_serializers()):
+        client_options["serializers"] = serializers
+
+    if cert_path:
+        client_options["ca_certs"] = cert_path
+
+    return Elasticsearch(addresses, verify_certs=verify_certs, **client_options)
 
 
 def return_article_db_conn(
@@ -67,6 +123,8 @@ def return_article_db_conn(
     index_name: str,
     ingest_pipeline: str | None,
     elser_model_id: str | None,
+    duplicate_index: NearDuplicateIndex | None = None,
+    request_timeouts: RequestTimeouts | None = None,
 ) -> ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery]:
 
     return ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery](
@@ -75,12 +133,16 @@ def return_article_db_conn(
         ingest_pipeline=ingest_pipeline,
         unique_field="url",
         elser_model_id=elser_model_id,
+        duplicate_index=duplicate_index,
+        request_timeouts=request_timeouts,
+        pipeline_input_fields=["title", "description", "content"],
         pre_pipelines=[
             PrePipeline(
                 name="Chunk for elser",
                 call=chunk_for_elser,
                 requires_elser=True,
                 requires_pipeline=True,
+                input_fields=["content"],
             )
         ],
         document_object_classes={
@@ -97,6 +159,7 @@ def return_cluster_db_conn(
     index_name: str,
     ingest_pipeline: str | None,
     elser_model_id: str | None,
+    request_timeouts: RequestTimeouts | None = None,
 ) -> ElasticDB[BaseCluster, PartialCluster, FullCluster, ClusterSearchQuery]:
     return ElasticDB[BaseCluster, PartialCluster, FullCluster, ClusterSearchQuery](
         es_conn=es_conn,
@@ -104,6 +167,7 @@ def return_cluster_db_conn(
         ingest_pipeline=ingest_pipeline,
         unique_field="nr",
         elser_model_id=elser_model_id,
+        request_timeouts=request_timeouts,
         document_object_classes={
             "base": BaseCluster,
             "full": FullCluster,
@@ -118,6 +182,7 @@ def return_cve_db_conn(
     index_name: str,
     ingest_pipeline: str | None,
     elser_model_id: str | None,
+    request_timeouts: RequestTimeouts | None = None,
 ) -> ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery]:
     return ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery](
         es_conn=es_conn,
@@ -125,6 +190,7 @@ def return_cve_db_conn(
         ingest_pipeline=ingest_pipeline,
         unique_field="cve",
         elser_model_id=elser_model_id,
+        request_timeouts=request_timeouts,
         document_object_classes={
             "base": BaseCVE,
             "full": FullCVE,
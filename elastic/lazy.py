@@ -0,0 +1,34 @@
+from typing import Any
+
+from ..objects import (
+    ArticleBodyLoader,
+    BaseArticle,
+    FullArticle,
+    LazyArticle,
+    PartialArticle,
+)
+from .client import ElasticDB
+from .queries import ArticleSearchQuery
+
+
+def query_lazy_articles(
+    client: ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery],
+    search_q: ArticleSearchQuery | None = None,
+    batch_size: int = 100,
+) -> tuple[list[LazyArticle], list[dict[str, Any]]]:
+    """
+    Queries articles with every field except the content and formatted content, which the returned articles load on first access.
+    The articles share a loader, so accessing the content of one fetches it for the next `batch_size` articles in the results as well, using a single multi get.
+    """
+    articles, invalid_articles = client.query_documents_as(
+        search_q, LazyArticle.model_validate, ArticleBodyLoader.fields
+    )
+
+    loader = ArticleBodyLoader(
+        client.get_sources, [article.id for article in articles], batch_size
+    )
+
+    for article in articles:
+        article._loader = loader
+
+    return articles, invalid_articles
@@ -0,0 +1,324 @@
+from collections.abc import Generator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import itertools
+import logging
+import re
+from typing import Any, Literal, cast
+
+from pydantic import TypeAdapter
+
+from ..objects import (
+    BaseArticle,
+    FullArticle,
+    PartialArticle,
+    BaseCVE,
+    FullCVE,
+    PartialCVE,
+)
+from .client import ElasticDB, update_timestamp
+from .queries import ArticleSearchQuery, CVESearchQuery
+
+logger = logging.getLogger("osinter")
+
+CVE_PATTERN = "CVE-[0-9]+-[0-9]+"
+
+# Adds the articles which aren't already members, making it safe to apply the same articles multiple times
+ADD_MEMBERS_SCRIPT = """
+if (ctx._source.documents == null) { ctx._source.documents = new ArrayList(); }
+if (ctx._source.dating == null) { ctx._source.dating = new ArrayList(); }
+
+boolean changed = false;
+
+for (int i = 0; i < params.documents.size(); i++) {
+    if (!ctx._source.documents.contains(params.documents.get(i))) {
+        ctx._source.documents.add(params.documents.get(i));
+
+        if (!ctx._source.dating.contains(params.dating.get(i))) {
+            ctx._source.dating.add(params.dating.get(i));
+        }
+
+        changed = true;
+    }
+}
+
+if (changed) {
+    ctx._source.document_count = ctx._source.documents.size();
+    ctx._source.updated_at = params.updated_at;
+} else {
+    ctx.op = "noop";
+}
+"""
+
+date_adapter = TypeAdapter(datetime)
+
+
+# Clusters and CVEs can be loaded without their documents and dating fields by using completeness=False or a list of fields, after which the members can be paged through using these functions
+@dataclass
+class MembershipPage:
+    ids: list[str]
+    dating: list[datetime]
+    cursor: str | None
+
+
+def _query_members(
+    article_client: ElasticDB[
+        BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery
+    ],
+    search_q: ArticleSearchQuery,
+) -> MembershipPage:
+    articles, _, cursor = article_client.query_documents_page(
+        search_q, ["publish_date"]
+    )
+
+    members = [
+        (article.id, article.publish_date)
+        for article in articles
+        if article.publish_date
+    ]
+
+    return MembershipPage(
+        ids=[id for id, _ in members],
+        dating=[date for _, date in members],
+        cursor=cursor,
+    )
+
+
+def query_cluster_members(
+    article_client: ElasticDB[
+        BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery
+    ],
+    cluster_id: str,
+    limit: int = 10,
+    sort_order: Literal["desc", "asc"] = "desc",
+    first_date: datetime | None = None,
+    last_date: datetime | None = None,
+    cursor: str | None = None,
+) -> MembershipPage:
+    """Returns a page of IDs and publish dates for the articles with `ml.cluster` set to the cluster ID"""
+    return _query_members(
+        article_client,
+        ArticleSearchQuery(
+            limit=limit,
+            sort_by="publish_date",
+            sort_order=sort_order,
+            first_date=first_date,
+            last_date=last_date,
+            cluster_id=cluster_id,
+            cursor=cursor,
+        ),
+    )
+
+
+def query_cve_members(
+    article_client: ElasticDB[
+        BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery
+    ],
+    cve: str,
+    limit: int = 10,
+    sort_order: Literal["desc", "asc"] = "desc",
+    first_date: datetime | None = None,
+    last_date: datetime | None = None,
+    cursor: str | None = None,
+) -> MembershipPage:
+    """Returns a page of IDs and publish dates for the articles tagged with the CVE"""
+    return _query_members(
+        article_client,
+        ArticleSearchQuery(
+            limit=limit,
+            sort_by="publish_date",
+            sort_order=sort_order,
+            first_date=first_date,
+            last_date=last_date,
+            cve=cve,
+            cursor=cursor,
+        ),
+    )
+
+
+def _format_date(value: datetime | str) -> str:
+    """Formats publish dates the same way regardless of how they were read, as the membership script compares them as strings"""
+    return cast(
+        str,
+        date_adapter.dump_python(date_adapter.validate_python(value), mode="json"),
+    )
+
+
+def _window_query(since: datetime | None, until: datetime | None) -> dict[str, Any]:
+    query = ArticleSearchQuery(
+        limit=1, date_field="inserted_at", first_date=since, last_date=until
+    ).generate_es_query(None, False)
+
+    query["size"] = 0
+
+    for key in ["sort", "source_includes", "source_excludes"]:
+        query.pop(key, None)
+
+    return query
+
+
+def update_cve_memberships(
+    article_client: ElasticDB[
+        BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery
+    ],
+    cve_client: ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery],
+    since: datetime | None,
+    batch_size: int = 1000,
+) -> datetime | None:
+    """
+    Adds the articles inserted since the watermark to the documents, dating and document count of the CVEs they mention.
+    Returns the new watermark, which should be persisted and passed on the next run.
+    The mentioned CVEs are paged through with a composite aggregation, `batch_size` CVEs at a time.
+    """
+    watermark_value = article_client.query_aggregations(
+        {
+            **_window_query(since, None),
+            "aggs": {"watermark": {"max": {"field": "inserted_at"}}},
+        },
+        "update_cve_memberships",
+    )["watermark"]["value"]
+
+    if not watermark_value:
+        return since
+
+    # Articles inserted after the watermark are left for the next run, so every page covers the same articles
+    watermark = datetime.fromtimestamp(watermark_value / 1000, timezone.utc)
+    query = _window_query(since, watermark)
+
+    after_key: dict[str, Any] | None = None
+    updated = failed = 0
+
+    while True:
+        composite: dict[str, Any] = {
+            "size": batch_size,
+            "sources": [{"cve": {"terms": {"field": "tags.interesting.values"}}}],
+        }
+
+        if after_key:
+            composite["after"] = after_key
+
+        cves = article_client.query_aggregations(
+            {
+                **query,
+                "aggs": {
+                    "cves": {
+                        "composite": composite,
+                        "aggs": {
+                            "articles": {
+                                "top_hits": {
+                                    "size": 100,
+                                    "_source": {"includes": ["publish_date"]},
+                                }
+                            }
+                        },
+                    }
+                },
+            },
+            "update_cve_memberships",
+        )["cves"]
+
+        members: dict[str, dict[str, str]] = {}
+
+        for bucket in cves["buckets"]:
+            cve = bucket["key"]["cve"]
+
+            # Composite aggregations can't filter the values of the field, so other interesting tags are skipped here
+            if not re.fullmatch(CVE_PATTERN, cve):
+                continue
+
+            hits = bucket["articles"]["hits"]["hits"]
+
+            if bucket["doc_count"] <= len(hits):
+                members[cve] = {
+                    hit["_id"]: _format_date(hit["_source"]["publish_date"])
+                    for hit in hits
+                    if hit["_source"].get("publish_date")
+                }
+            else:
+                members[cve] = {
+                    id: _format_date(date)
+                    for id, date in _scan_members(
+                        article_client,
+                        ArticleSearchQuery(
+                            limit=10_000,
+                            date_field="inserted_at",
+                            first_date=since,
+                            last_date=watermark,
+                            cve=cve,
+                        ),
+                    )
+                }
+
+        page_updated, page_failed = _add_members(cve_client, members)
+        updated += page_updated
+        failed += page_failed
+
+        if "after_key" not in cves or len(cves["buckets"]) < batch_size:
+            break
+
+        after_key = cves["after_key"]
+
+    logger.info(f"Updated memberships for {updated} CVEs, with {failed} failing")
+
+    return watermark
+
+
+def _add_members(
+    cve_client: ElasticDB[BaseCVE, PartialCVE, FullCVE, CVESearchQuery],
+    members: dict[str, dict[str, str]],
+) -> tuple[int, int]:
+    """Adds the members to the CVEs present in the CVE index, returning the number of updated and failed CVEs"""
+    cve_ids: dict[str, str] = {}
+
+    for cve_batch in itertools.batched(members.keys(), 10_000):
+        cves = cve_client.query_documents(
+            CVESearchQuery(limit=len(cve_batch), cves=set(cve_batch)), ["cve"]
+        )[0]
+        cve_ids.update({cve.cve: cve.id for cve in cves if cve.cve})
+
+    if len(cve_ids) < len(members):
+        logger.debug(
+            f"Skipping {len(members) - len(cve_ids)} CVEs which aren't present in the CVE index"
+        )
+
+    updated_at = update_timestamp()
+
+    actions = [
+        {
+            "_op_type": "update",
+            "_index": cve_client.index_name,
+            "_id": cve_ids[cve],
+            "script": {
+                "source": ADD_MEMBERS_SCRIPT,
+                "lang": "painless",
+                "params": {
+                    "documents": list(cve_members.keys()),
+                    "dating": list(cve_members.values()),
+                    "updated_at": updated_at,
+                },
+            },
+        }
+        for cve, cve_members in members.items()
+        if cve in cve_ids
+    ]
+
+    updated = cve_client.bulk(actions, raise_on_error=False)
+
+    return updated, len(actions) - updated
+
+
+def _scan_members(
+    article_client: ElasticDB[
+        BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery
+    ],
+    search_q: ArticleSearchQuery,
+) -> Generator[tuple[str, datetime], None, None]:
+    while True:
+        page = _query_members(article_client, search_q)
+
+        yield from zip(page.ids, page.dating)
+
+        if not page.cursor:
+            break
+
+        search_q.cursor = page.cursor
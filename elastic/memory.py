@@ -0,0 +1,1313 @@
+"""
+In-memory stand-in for the subset of Elasticsearch used by ElasticDB, for testing and benchmarking without a cluster.
+
+It is plugged in beneath the official client as a transport node, meaning requests still go through the client's serialization:
+
+    es_conn = create_es_conn("http://localhost:9200", False, node_class=InMemoryNode)
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import fnmatch
+import functools
+import gzip
+import itertools
+import json
+import operator
+import re
+from threading import RLock
+from time import perf_counter
+from typing import Any, ClassVar, NamedTuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import uuid
+import zlib
+
+from elastic_transport import ApiResponseMeta, BaseNode, HttpHeaders, NodeConfig
+from elastic_transport.client_utils import DEFAULT, DefaultType
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}")
+CALENDAR_UNITS = {
+    "minute": "m",
+    "1m": "m",
+    "hour": "h",
+    "1h": "h",
+    "day": "d",
+    "1d": "d",
+    "week": "w",
+    "1w": "w",
+    "month": "M",
+    "1M": "M",
+    "quarter": "q",
+    "1q": "q",
+    "year": "y",
+    "1y": "y",
+}
+FIXED_UNITS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+CALENDAR_MONTHS = {"M": 1, "q": 3, "y": 12}
+RANGE_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "gte": operator.ge,
+    "gt": operator.gt,
+    "lte": operator.le,
+    "lt": operator.lt,
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, error_type: str, reason: str) -> None:
+        super().__init__(reason)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+
+    def body(self) -> dict[str, Any]:
+        return {
+            "error": {
+                "root_cause": [{"type": self.error_type, "reason": self.reason}],
+                "type": self.error_type,
+                "reason": self.reason,
+            },
+            "status": self.status,
+        }
+
+
+# Painless isn't available, so only scripts made up of assignments to source fields are interpreted, like "ctx._source.read_times += 1"
+ASSIGNMENT_PATTERN = re.compile(
+    r"ctx\._source\.([\w.]+)\s*(\+=|-=|=)\s*(params\.\w+|-?\d+(?:\.\d+)?|true|false|null|\"[^\"]*\")"
+)
+
+# Other scripts are mapped to python implementations by their source
+SCRIPTS: dict[str, Callable[[dict[str, Any], dict[str, Any]], None]] = {}
+
+
+def register_script(
+    source: str, implementation: Callable[[dict[str, Any], dict[str, Any]], None]
+) -> None:
+    SCRIPTS[source] = implementation
+
+
+def _run_assignments(
+    source: str, ctx: dict[str, Any], params: dict[str, Any]
+) -> bool:
+    """Runs a script made up of assignments to source fields, returning False if the script is something else"""
+    assignments: list[re.Match[str]] = []
+
+    for statement in source.split(";"):
+        if not statement.strip():
+            continue
+
+        assignment = ASSIGNMENT_PATTERN.fullmatch(statement.strip())
+
+        if not assignment:
+            return False
+
+        assignments.append(assignment)
+
+    if not assignments:
+        return False
+
+    for assignment in assignments:
+        path, operator_symbol, raw_value = assignment.groups()
+
+        value: Any = (
+            params.get(raw_value.removeprefix("params."))
+            if raw_value.startswith("params.")
+            else json.loads(raw_value)
+        )
+
+        *parents, name = path.split(".")
+        target = ctx["_source"]
+
+        for parent in parents:
+            target = target.setdefault(parent, {})
+
+        if operator_symbol == "=":
+            target[name] = value
+        else:
+            sign = 1 if operator_symbol == "+=" else -1
+            target[name] = (target.get(name) or 0) + sign * value
+
+    return True
+
+
+@dataclass
+class StoredDocument:
+    source: dict[str, Any]
+    seq_no: int
+    order: int
+    version: int = 1
+
+
+class Hit(NamedTuple):
+    id: str
+    stored: StoredDocument
+    score: float
+    index_name: str
+
+
+@dataclass
+class InMemoryIndex:
+    documents: dict[str, StoredDocument] = field(default_factory=dict)
+    mappings: dict[str, Any] = field(default_factory=dict)
+    seq_no: int = -1
+
+
+def _to_comparable(value: Any) -> Any:
+    """Dates are compared and sorted as epoch milliseconds, like in Elasticsearch"""
+    if isinstance(value, str) and DATE_PATTERN.match(value):
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+
+        if not date.tzinfo:
+            date = date.replace(tzinfo=timezone.utc)
+
+        return int(date.timestamp() * 1000)
+
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+
+    return value
+
+
+def _values(source: dict[str, Any], path: str) -> list[Any]:
+    values: list[Any] = [source]
+
+    for key in path.split("."):
+        next_values: list[Any] = []
+
+        for value in values:
+            if isinstance(value, dict) and key in value:
+                item = value[key]
+                next_values.extend(item if isinstance(item, list) else [item])
+            elif isinstance(value, list):
+                for entry in value:
+                    if isinstance(entry, dict) and key in entry:
+                        item = entry[key]
+                        next_values.extend(item if isinstance(item, list) else [item])
+
+        values = next_values
+
+    return [value for value in values if value is not None]
+
+
+def _field_values(doc_id: str, source: dict[str, Any], path: str) -> list[Any]:
+    if path == "_id":
+        return [doc_id]
+
+    return _values(source, path.removesuffix(".exact").removesuffix(".keyword"))
+
+
+def _metric(agg_type: str, values: list[Any]) -> Any:
+    if agg_type == "value_count":
+        return len(values)
+    if agg_type == "cardinality":
+        return len(set(values))
+    if not values:
+        return 0 if agg_type == "sum" else None
+    if agg_type == "avg":
+        return sum(values) / len(values)
+
+    return {"max": max, "min": min, "sum": sum}[agg_type](values)  # type: ignore[operator]
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def _path_matches(path: str, patterns: list[str]) -> bool:
+    return any(
+        fnmatch.fnmatchcase(path, pattern) or path.startswith(pattern + ".")
+        for pattern in patterns
+    )
+
+
+def _filter_source(
+    source: Any, includes: list[str], excludes: list[str], prefix: str = ""
+) -> Any:
+    if isinstance(source, list):
+        return [_filter_source(item, includes, excludes, prefix) for item in source]
+
+    if not isinstance(source, dict):
+        return source
+
+    filtered: dict[str, Any] = {}
+
+    for key, value in source.items():
+        path = prefix + key
+
+        if _path_matches(path, excludes):
+            continue
+
+        if not includes or _path_matches(path, includes):
+            filtered[key] = _filter_source(value, [], excludes, path + ".")
+        elif any(pattern.startswith(path + ".") for pattern in includes) and isinstance(
+            value, (dict, list)
+        ):
+            filtered[key] = _filter_source(value, includes, excludes, path + ".")
+
+    return filtered
+
+
+def _source_filter(
+    body: dict[str, Any], params: dict[str, str]
+) -> tuple[bool, list[str], list[str]]:
+    enabled = True
+    includes: list[str] = []
+    excludes: list[str] = []
+
+    source = body.get("_source", params.get("_source"))
+
+    if isinstance(source, bool) or source in ("true", "false"):
+        enabled = source in (True, "true")
+    elif isinstance(source, str):
+        includes = source.split(",")
+    elif isinstance(source, list):
+        includes = source
+    elif isinstance(source, dict):
+        includes = list(source.get("includes", []))
+        excludes = list(source.get("excludes", []))
+
+    if "_source_includes" in params:
+        includes = params["_source_includes"].split(",")
+    if "_source_excludes" in params:
+        excludes = params["_source_excludes"].split(",")
+
+    return enabled, includes, excludes
+
+
+class InMemoryCluster:
+    def __init__(self) -> None:
+        self.indices: dict[str, InMemoryIndex] = {}
+        self.pits: dict[str, list[str]] = {}
+        self.tasks: dict[str, dict[str, Any]] = {}
+        self.lock = RLock()
+        self.order = itertools.count()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.indices.clear()
+            self.pits.clear()
+            self.tasks.clear()
+
+    def _index(self, name: str, create: bool = False) -> InMemoryIndex:
+        if name not in self.indices:
+            if not create:
+                raise RequestError(
+                    404, "index_not_found_exception", f"no such index [{name}]"
+                )
+
+            self.indices[name] = InMemoryIndex()
+
+        return self.indices[name]
+
+    def _resolve_indices(self, names: str | None) -> list[str]:
+        if not names or names in ("_all", "*"):
+            return list(self.indices)
+
+        resolved: list[str] = []
+
+        for name in names.split(","):
+            if "*" in name:
+                resolved.extend(fnmatch.filter(self.indices, name))
+            else:
+                self._index(name)
+                resolved.append(name)
+
+        return resolved
+
+    # Query evaluation
+
+    def _matches(
+        self, doc_id: str, source: dict[str, Any], query: dict[str, Any] | None
+    ) -> float | None:
+        """Returns the score of the document if it matches the query, otherwise None"""
+        if not query:
+            return 1.0
+
+        (clause_type, clause), *_ = query.items()
+
+        if clause_type == "match_all":
+            return 1.0
+
+        if clause_type == "match_none":
+            return None
+
+        if clause_type == "bool":
+            score = 0.0
+
+            for sub_query in [*clause.get("must", []), *clause.get("filter", [])]:
+                sub_score = self._matches(doc_id, source, sub_query)
+
+                if sub_score is None:
+                    return None
+
+                score += sub_score
+
+            for sub_query in clause.get("must_not", []):
+                if self._matches(doc_id, source, sub_query) is not None:
+                    return None
+
+            should = clause.get("should", [])
+            should_scores = [
+                sub_score
+                for sub_query in should
+                if (sub_score := self._matches(doc_id, source, sub_query)) is not None
+            ]
+
+            minimum_should_match = int(
+                clause.get(
+                    "minimum_should_match",
+                    0 if clause.get("must") or clause.get("filter") or not should else 1,
+                )
+            )
+
+            if len(should_scores) < minimum_should_match:
+                return None
+
+            return score + sum(should_scores) or 1.0
+
+        if clause_type == "term":
+            (path, value), *_ = clause.items()
+            value = value["value"] if isinstance(value, dict) else value
+
+            return (
+                1.0
+                if _to_comparable(value)
+                in [_to_comparable(v) for v in _field_values(doc_id, source, path)]
+                else None
+            )
+
+        if clause_type == "terms":
+            path, values = next(
+                (key, value) for key, value in clause.items() if key != "boost"
+            )
+            wanted = {_to_comparable(value) for value in values}
+
+            return (
+                1.0
+                if any(
+                    _to_comparable(v) in wanted
+                    for v in _field_values(doc_id, source, path)
+                )
+                else None
+            )
+
+        if clause_type == "ids":
+            return 1.0 if doc_id in clause["values"] else None
+
+        if clause_type == "exists":
+            return 1.0 if _field_values(doc_id, source, clause["field"]) else None
+
+        if clause_type == "range":
+            (path, bounds), *_ = clause.items()
+
+            for value in _field_values(doc_id, source, path):
+                value = _to_comparable(value)
+
+                if all(
+                    op not in bounds or compare(value, _to_comparable(bounds[op]))
+                    for op, compare in RANGE_OPERATORS.items()
+                ):
+                    return 1.0
+
+            return None
+
+        if clause_type in ("simple_query_string", "multi_match", "query_string"):
+            query_words = _words(clause["query"])
+            fields = [field.split("^")[0] for field in clause.get("fields", ["*"])]
+            text = " ".join(
+                str(value)
+                for path in fields
+                for value in (
+                    _field_values(doc_id, source, path)
+                    if path != "*"
+                    else list(source.values())
+                )
+            )
+            hits = len(query_words & _words(text))
+
+            return float(hits) if hits else None
+
+        if clause_type == "match":
+            (path, value), *_ = clause.items()
+            value = value["query"] if isinstance(value, dict) else value
+
+            return self._matches(
+                doc_id,
+                source,
+                {"simple_query_string": {"query": str(value), "fields": [path]}},
+            )
+
+        # Semantic queries can't be evaluated without the models, so they never match
+        if clause_type in ("text_expansion", "sparse_vector", "nested", "knn"):
+            return None
+
+        raise RequestError(
+            400,
+            "parsing_exception",
+            f"unknown query [{clause_type}] in the in-memory stand-in",
+        )
+
+    # Sorting
+
+    def _sort_spec(self, sort: Any) -> list[tuple[str, bool]]:
+        spec: list[tuple[str, bool]] = []
+
+        for entry in sort if isinstance(sort, list) else [sort]:
+            if isinstance(entry, str):
+                path, order = entry, "desc" if entry == "_score" else "asc"
+            else:
+                (path, order), *_ = entry.items()
+                order = order["order"] if isinstance(order, dict) else order
+
+            spec.append((path, order == "desc"))
+
+        return spec
+
+    def _sort_values(self, hit: Hit, spec: list[tuple[str, bool]]) -> list[Any]:
+        values: list[Any] = []
+
+        for path, descending in spec:
+            if path == "_score":
+                values.append(hit.score)
+            elif path in ("_doc", "_shard_doc"):
+                values.append(hit.stored.order)
+            else:
+                field_values = [
+                    _to_comparable(value)
+                    for value in _field_values(hit.id, hit.stored.source, path)
+                ]
+                values.append(
+                    (max(field_values) if descending else min(field_values))
+                    if field_values
+                    else None
+                )
+
+        return values
+
+    @staticmethod
+    def _compare(
+        a: list[Any], b: list[Any], spec: list[tuple[str, bool]]
+    ) -> int:
+        for value_a, value_b, (_, descending) in zip(a, b, spec):
+            if value_a == value_b:
+                continue
+
+            # Missing values are sorted last regardless of order
+            if value_a is None:
+                return 1
+            if value_b is None:
+                return -1
+
+            result = -1 if value_a < value_b else 1
+            return -result if descending else result
+
+        return 0
+
+    # Aggregations
+
+    def _aggregate(
+        self,
+        hits: list[Hit],
+        aggregations: dict[str, Any],
+    ) -> dict[str, Any]:
+        results: dict[str, Any] = {}
+
+        for name, definition in aggregations.items():
+            sub_aggregations = definition.get("aggs", definition.get("aggregations"))
+            agg_type, agg = next(
+                (key, value)
+                for key, value in definition.items()
+                if key not in ("aggs", "aggregations", "meta")
+            )
+
+            result: dict[str, Any]
+
+            if agg_type == "filter":
+                bucket_hits = [
+                    hit
+                    for hit in hits
+                    if self._matches(hit.id, hit.stored.source, agg) is not None
+                ]
+                result = self._bucket(bucket_hits, sub_aggregations)
+            elif agg_type == "filters":
+                result = {
+                    "buckets": {
+                        key: self._bucket(
+                            [
+                                hit
+                                for hit in hits
+                                if self._matches(hit.id, hit.stored.source, bucket_filter)
+                                is not None
+                            ],
+                            sub_aggregations,
+                        )
+                        for key, bucket_filter in agg["filters"].items()
+                    }
+                }
+            elif agg_type == "terms":
+                result = self._terms(hits, agg, sub_aggregations)
+            elif agg_type == "composite":
+                result = self._composite(hits, agg, sub_aggregations)
+            elif agg_type == "date_histogram":
+                result = self._date_histogram(hits, agg, sub_aggregations)
+            elif agg_type in ("max", "min", "sum", "avg", "value_count", "cardinality"):
+                values = [
+                    _to_comparable(value)
+                    for hit in hits
+                    for value in _field_values(hit.id, hit.stored.source, agg["field"])
+                ]
+                result = {"value": _metric(agg_type, values)}
+            elif agg_type == "top_hits":
+                enabled, includes, excludes = _source_filter(agg, {})
+                ordered = self._sorted(hits, self._sort_spec(agg.get("sort", ["_doc"])))
+                result = {
+                    "hits": {
+                        "total": {"value": len(hits), "relation": "eq"},
+                        "hits": [
+                            self._hit(hit, None, enabled, includes, excludes)
+                            for hit, _ in ordered[: agg.get("size", 3)]
+                        ],
+                    }
+                }
+            else:
+                raise RequestError(
+                    400,
+                    "parsing_exception",
+                    f"unknown aggregation [{agg_type}] in the in-memory stand-in",
+                )
+
+            results[name] = result
+
+        return results
+
+    def _bucket(
+        self,
+        hits: list[Hit],
+        sub_aggregations: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        bucket: dict[str, Any] = {"doc_count": len(hits)}
+
+        if sub_aggregations:
+            bucket.update(self._aggregate(hits, sub_aggregations))
+
+        return bucket
+
+    def _terms(
+        self,
+        hits: list[Hit],
+        agg: dict[str, Any],
+        sub_aggregations: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        grouped: dict[Any, list[Hit]] = {}
+        include = re.compile(agg["include"]) if isinstance(agg.get("include"), str) else None
+
+        for hit in hits:
+            for value in set(_field_values(hit.id, hit.stored.source, agg["field"])):
+                if include and not include.fullmatch(str(value)):
+                    continue
+
+                grouped.setdefault(value, []).append(hit)
+
+        ordered = sorted(grouped.items(), key=lambda item: (-len(item[1]), str(item[0])))
+        size = agg.get("size", 10)
+
+        return {
+            "doc_count_error_upper_bound": 0,
+            "sum_other_doc_count": sum(len(group) for _, group in ordered[size:]),
+            "buckets": [
+                {"key": key, **self._bucket(group, sub_aggregations)}
+                for key, group in ordered[:size]
+            ],
+        }
+
+    def _composite(
+        self,
+        hits: list[Hit],
+        agg: dict[str, Any],
+        sub_aggregations: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        # Only terms sources are supported, ordered ascending
+        names: list[str] = []
+        fields: list[str] = []
+
+        for source in agg["sources"]:
+            ((name, definition),) = source.items()
+
+            if "terms" not in definition:
+                raise RequestError(
+                    400,
+                    "parsing_exception",
+                    "only terms sources are supported for composite aggregations in the in-memory stand-in",
+                )
+
+            names.append(name)
+            fields.append(definition["terms"]["field"])
+
+        grouped: dict[tuple[Any, ...], list[Hit]] = {}
+
+        for hit in hits:
+            for key in itertools.product(
+                *[
+                    set(_field_values(hit.id, hit.stored.source, field))
+                    for field in fields
+                ]
+            ):
+                grouped.setdefault(key, []).append(hit)
+
+        def comparable(key: tuple[Any, ...]) -> tuple[Any, ...]:
+            return tuple(_to_comparable(value) for value in key)
+
+        ordered = sorted(grouped.items(), key=lambda item: comparable(item[0]))
+
+        if "after" in agg:
+            after = comparable(tuple(agg["after"][name] for name in names))
+            ordered = [item for item in ordered if comparable(item[0]) > after]
+
+        buckets = [
+            {"key": dict(zip(names, key)), **self._bucket(group, sub_aggregations)}
+            for key, group in ordered[: agg.get("size", 10)]
+        ]
+
+        if not buckets:
+            return {"buckets": []}
+
+        return {"after_key": buckets[-1]["key"], "buckets": buckets}
+
+    def _date_histogram(
+        self,
+        hits: list[Hit],
+        agg: dict[str, Any],
+        sub_aggregations: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        if "calendar_interval" in agg:
+            unit = CALENDAR_UNITS[agg["calendar_interval"]]
+            length = 7 * FIXED_UNITS["d"] if unit == "w" else FIXED_UNITS.get(unit, 0)
+        else:
+            amount, unit = re.fullmatch(
+                r"(\d+)(ms|s|m|h|d)", agg.get("fixed_interval", "1d")
+            ).groups()  # type: ignore[union-attr]
+            length = int(amount) * FIXED_UNITS[unit]
+
+        def floor(millis: int) -> int:
+            date = datetime.fromtimestamp(millis / 1000, timezone.utc)
+
+            if unit == "w":
+                date = date.replace(hour=0, minute=0, second=0, microsecond=0)
+                return int((date - timedelta(days=date.weekday())).timestamp() * 1000)
+
+            if unit in CALENDAR_MONTHS:
+                month = date.month - (date.month - 1) % CALENDAR_MONTHS[unit]
+                date = datetime(date.year, month, 1, tzinfo=timezone.utc)
+                return int(date.timestamp() * 1000)
+
+            return millis - millis % length
+
+        def advance(millis: int) -> int:
+            if unit not in CALENDAR_MONTHS:
+                return millis + length
+
+            date = datetime.fromtimestamp(millis / 1000, timezone.utc)
+            month = date.month - 1 + CALENDAR_MONTHS[unit]
+
+            return int(
+                date.replace(year=date.year + month // 12, month=month % 12 + 1).timestamp()
+                * 1000
+            )
+
+        grouped: dict[int, list[Hit]] = {}
+
+        for hit in hits:
+            for key in {
+                floor(_to_comparable(value))
+                for value in _field_values(hit.id, hit.stored.source, agg["field"])
+            }:
+                grouped.setdefault(key, []).append(hit)
+
+        keys = set(grouped)
+        min_doc_count = agg.get("min_doc_count", 1)
+
+        if min_doc_count == 0:
+            bounds = agg.get("extended_bounds", {})
+            keys.update(floor(_to_comparable(bounds[bound])) for bound in bounds)
+
+            if keys:
+                key, last = min(keys), max(keys)
+
+                while key <= last:
+                    keys.add(key)
+                    key = advance(key)
+
+        return {
+            "buckets": [
+                {
+                    "key_as_string": datetime.fromtimestamp(key / 1000, timezone.utc)
+                    .isoformat()
+                    .replace("+00:00", "Z"),
+                    "key": key,
+                    **self._bucket(grouped.get(key, []), sub_aggregations),
+                }
+                for key in sorted(keys)
+                if len(grouped.get(key, [])) >= min_doc_count
+            ]
+        }
+
+    # Search
+
+    def _sorted(
+        self,
+        hits: list[Hit],
+        spec: list[tuple[str, bool]],
+    ) -> list[tuple[Hit, list[Any]]]:
+        def compare(a: tuple[Hit, list[Any]], b: tuple[Hit, list[Any]]) -> int:
+            return self._compare(a[1], b[1], spec)
+
+        return sorted(
+            [(hit, self._sort_values(hit, spec)) for hit in hits],
+            key=functools.cmp_to_key(compare),
+        )
+
+    def _hit(
+        self,
+        hit: Hit,
+        sort_values: list[Any] | None,
+        source_enabled: bool,
+        includes: list[str],
+        excludes: list[str],
+    ) -> dict[str, Any]:
+        response: dict[str, Any] = {
+            "_index": hit.index_name,
+            "_id": hit.id,
+            "_score": hit.score,
+        }
+
+        if source_enabled:
+            response["_source"] = _filter_source(hit.stored.source, includes, excludes)
+
+        if sort_values is not None:
+            response["sort"] = sort_values
+
+        return response
+
+    def search(
+        self, index: str | None, body: dict[str, Any], params: dict[str, str]
+    ) -> dict[str, Any]:
+        start = perf_counter()
+
+        if "pit" in body:
+            if body["pit"]["id"] not in self.pits:
+                raise RequestError(
+                    404,
+                    "search_context_missing_exception",
+                    "No search context found for the point in time",
+                )
+
+            indices = self.pits[body["pit"]["id"]]
+        else:
+            indices = self._resolve_indices(index)
+
+        matched: list[Hit] = []
+
+        for index_name in indices:
+            for doc_id, stored in self.indices[index_name].documents.items():
+                score = self._matches(doc_id, stored.source, body.get("query"))
+
+                if score is not None:
+                    matched.append(Hit(doc_id, stored, score, index_name))
+
+        # Sliced searches partitions the documents by a hash of their ID
+        if "slice" in body:
+            matched = [
+                hit
+                for hit in matched
+                if zlib.crc32(hit.id.encode()) % body["slice"]["max"]
+                == body["slice"]["id"]
+            ]
+
+        aggregation_definitions = body.get("aggs", body.get("aggregations"))
+        aggregations = (
+            self._aggregate(matched, aggregation_definitions)
+            if aggregation_definitions
+            else None
+        )
+
+        if body.get("post_filter"):
+            matched = [
+                hit
+                for hit in matched
+                if self._matches(hit.id, hit.stored.source, body["post_filter"])
+                is not None
+            ]
+
+        sort_given = "sort" in body
+        spec = self._sort_spec(body.get("sort", ["_score"]))
+
+        # Searches using a point in time gets an implicit tiebreaker
+        if "pit" in body and not any(path in ("_doc", "_shard_doc") for path, _ in spec):
+            spec.append(("_shard_doc", False))
+
+        ordered = self._sorted(matched, spec)
+
+        if body.get("search_after") is not None:
+            search_after = [_to_comparable(value) for value in body["search_after"]]
+            ordered = [
+                hit
+                for hit in ordered
+                if self._compare(hit[1], search_after, spec) > 0
+            ]
+
+        offset = int(body.get("from", params.get("from", 0)))
+        size = int(body.get("size", params.get("size", 10)))
+        enabled, includes, excludes = _source_filter(body, params)
+
+        response: dict[str, Any] = {
+            "took": int((perf_counter() - start) * 1000),
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {
+                "total": {"value": len(matched), "relation": "eq"},
+                "max_score": max((hit.score for hit in matched), default=None),
+                "hits": [
+                    {
+                        **self._hit(
+                            hit,
+                            sort_values if sort_given or "pit" in body else None,
+                            enabled,
+                            includes,
+                            excludes,
+                        ),
+                        **self._fields(hit, body.get("fields")),
+                    }
+                    for hit, sort_values in ordered[offset : offset + size]
+                ],
+            },
+        }
+
+        if aggregations is not None:
+            response["aggregations"] = aggregations
+
+        if "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+
+        if body.get("profile"):
+            response["profile"] = {
+                "shards": [
+                    {
+                        "id": f"[memory][{index_name}][0]",
+                        "searches": [
+                            {
+                                "query": [
+                                    {
+                                        "type": "InMemoryQuery",
+                                        "description": json.dumps(body.get("query")),
+                                        "time_in_nanos": response["took"] * 1_000_000,
+                                        "breakdown": {},
+                                    }
+                                ],
+                                "rewrite_time": 0,
+                                "collector": [],
+                            }
+                        ],
+                        "aggregations": [],
+                    }
+                    for index_name in indices
+                ]
+            }
+
+        return response
+
+    def _fields(self, hit: Hit, fields: list[Any] | None) -> dict[str, Any]:
+        if not fields:
+            return {}
+
+        values: dict[str, list[Any]] = {}
+
+        for entry in fields:
+            path = entry["field"] if isinstance(entry, dict) else entry
+            field_values = _field_values(hit.id, hit.stored.source, path)
+
+            if field_values:
+                values[path] = field_values
+
+        return {"fields": values}
+
+    # Documents
+
+    def _write(
+        self,
+        index_name: str,
+        doc_id: str | None,
+        source: dict[str, Any],
+        op_type: str = "index",
+    ) -> dict[str, Any]:
+        index = self._index(index_name, create=True)
+        doc_id = doc_id or uuid.uuid4().hex
+
+        existing = index.documents.get(doc_id)
+
+        if existing and op_type == "create":
+            raise RequestError(
+                409,
+                "version_conflict_engine_exception",
+                f"[{doc_id}]: version conflict, document already exists (current version [{existing.version}])",
+            )
+
+        index.seq_no += 1
+        index.documents[doc_id] = StoredDocument(
+            source=source,
+            seq_no=index.seq_no,
+            order=existing.order if existing else next(self.order),
+            version=existing.version + 1 if existing else 1,
+        )
+
+        return self._write_result(index_name, doc_id, "updated" if existing else "created")
+
+    def _write_result(self, index_name: str, doc_id: str, result: str) -> dict[str, Any]:
+        stored = self.indices[index_name].documents.get(doc_id)
+
+        return {
+            "_index": index_name,
+            "_id": doc_id,
+            "_version": stored.version if stored else 1,
+            "result": result,
+            "_shards": {"total": 1, "successful": 1, "failed": 0},
+            "_seq_no": stored.seq_no if stored else self.indices[index_name].seq_no,
+            "_primary_term": 1,
+        }
+
+    def _update(self, index_name: str, doc_id: str, body: dict[str, Any]) -> dict[str, Any]:
+        index = self._index(index_name, create=True)
+        stored = index.documents.get(doc_id)
+
+        if not stored:
+            if body.get("doc_as_upsert") and "doc" in body:
+                return self._write(index_name, doc_id, body["doc"])
+            if "upsert" in body:
+                return self._write(index_name, doc_id, body["upsert"])
+
+            raise RequestError(
+                404, "document_missing_exception", f"[{doc_id}]: document missing"
+            )
+
+        source = json.loads(json.dumps(stored.source))
+
+        if "doc" in body:
+            _merge(source, body["doc"])
+
+        if "script" in body:
+            script = body["script"]
+            script_source = script if isinstance(script, str) else script["source"]
+
+            params = script.get("params", {}) if isinstance(script, dict) else {}
+            ctx: dict[str, Any] = {"_source": source, "op": "index"}
+
+            if script_source in SCRIPTS:
+                SCRIPTS[script_source](ctx, params)
+            elif not _run_assignments(script_source, ctx, params):
+                raise RequestError(
+                    400,
+                    "illegal_argument_exception",
+                    "Script isn't supported by the in-memory stand-in, register a python implementation of it with register_script",
+                )
+
+            if ctx["op"] == "noop":
+                return self._write_result(index_name, doc_id, "noop")
+
+        if source == stored.source:
+            return self._write_result(index_name, doc_id, "noop")
+
+        return self._write(index_name, doc_id, source)
+
+    def _delete(self, index_name: str, doc_id: str) -> dict[str, Any]:
+        index = self._index(index_name, create=True)
+
+        if doc_id not in index.documents:
+            return {**self._write_result(index_name, doc_id, "not_found"), "status": 404}
+
+        index.seq_no += 1
+        del index.documents[doc_id]
+
+        return self._write_result(index_name, doc_id, "deleted")
+
+    def _get(self, index_name: str, doc_id: str, params: dict[str, str], body: dict[str, Any] | None = None) -> dict[str, Any]:
+        index = self.indices.get(index_name)
+        stored = index.documents.get(doc_id) if index else None
+
+        if not stored:
+            return {"_index": index_name, "_id": doc_id, "found": False}
+
+        enabled, includes, excludes = _source_filter(body or {}, params)
+
+        document: dict[str, Any] = {
+            "_index": index_name,
+            "_id": doc_id,
+            "_version": stored.version,
+            "_seq_no": stored.seq_no,
+            "_primary_term": 1,
+            "found": True,
+        }
+
+        if enabled:
+            document["_source"] = _filter_source(stored.source, includes, excludes)
+
+        return document
+
+    def bulk(self, index: str | None, body: bytes, params: dict[str, str]) -> dict[str, Any]:
+        start = perf_counter()
+        lines = [line for line in body.split(b"\n") if line.strip()]
+        items: list[dict[str, Any]] = []
+        position = 0
+
+        while position < len(lines):
+            (op_type, meta), *_ = json.loads(lines[position]).items()
+            position += 1
+
+            index_name = meta.get("_index", index)
+            doc_id = meta.get("_id")
+            payload: dict[str, Any] = {}
+
+            if op_type != "delete":
+                payload = json.loads(lines[position])
+                position += 1
+
+            try:
+                if op_type in ("index", "create"):
+                    result = self._write(index_name, doc_id, payload, op_type)
+                    status = 201 if result["result"] == "created" else 200
+                elif op_type == "update":
+                    result = self._update(index_name, doc_id, payload)
+                    status = 201 if result["result"] == "created" else 200
+                elif op_type == "delete":
+                    result = self._delete(index_name, doc_id)
+                    status = result.pop("status", 200)
+                else:
+                    raise RequestError(
+                        400, "illegal_argument_exception", f"Unknown operation {op_type}"
+                    )
+
+                items.append({op_type: {**result, "status": status}})
+            except RequestError as e:
+                items.append(
+                    {
+                        op_type: {
+                            "_index": index_name,
+                            "_id": doc_id,
+                            "status": e.status,
+                            "error": {"type": e.error_type, "reason": e.reason},
+                        }
+                    }
+                )
+
+        return {
+            "took": int((perf_counter() - start) * 1000),
+            "errors": any("error" in next(iter(item.values())) for item in items),
+            "items": items,
+        }
+
+    def mget(self, index: str | None, body: dict[str, Any], params: dict[str, str]) -> dict[str, Any]:
+        docs = body.get("docs") or [{"_id": doc_id} for doc_id in body.get("ids", [])]
+
+        return {
+            "docs": [
+                self._get(doc.get("_index", index), doc["_id"], params, doc)
+                for doc in docs
+            ]
+        }
+
+    # Routing
+
+    def handle(
+        self, method: str, target: str, body: bytes | None
+    ) -> tuple[int, Any]:
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        def json_body() -> dict[str, Any]:
+            return json.loads(body) if body else {}
+
+        with self.lock:
+            if not parts:
+                return 200, {
+                    "name": "in-memory",
+                    "cluster_name": "in-memory",
+                    "version": {"number": "8.13.0"},
+                    "tagline": "You Know, for Search",
+                }
+
+            endpoint = next((part for part in parts if part.startswith("_")), None)
+            index = parts[0] if not parts[0].startswith("_") else None
+
+            if endpoint == "_search":
+                return 200, self.search(index, json_body(), params)
+
+            if endpoint == "_pit":
+                if method == "DELETE":
+                    pit_id = str(json_body().get("id"))
+                    return 200, {
+                        "succeeded": self.pits.pop(pit_id, None) is not None,
+                        "num_freed": 1,
+                    }
+
+                pit_id = uuid.uuid4().hex
+                self.pits[pit_id] = self._resolve_indices(index)
+                return 200, {"id": pit_id}
+
+            if endpoint == "_bulk":
+                return 200, self.bulk(index, body or b"", params)
+
+            if endpoint == "_mget":
+                return 200, self.mget(index, json_body(), params)
+
+            if endpoint == "_tasks":
+                task_id = parts[1]
+
+                if task_id not in self.tasks:
+                    raise RequestError(
+                        404, "resource_not_found_exception", f"task [{task_id}] isn't running and hasn't stored its results"
+                    )
+
+                if parts[-1] == "_cancel":
+                    self.tasks[task_id]["task"]["cancelled"] = True
+                    return 200, {"nodes": {}}
+
+                return 200, self.tasks[task_id]
+
+            if endpoint == "_refresh":
+                return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+            if index and endpoint in ("_doc", "_create") and len(parts) >= 2:
+                doc_id = parts[2] if len(parts) > 2 else None
+
+                if method == "GET" or method == "HEAD":
+                    document = self._get(index, doc_id or "", params)
+                    return (200 if document["found"] else 404), document
+
+                if method == "DELETE":
+                    result = self._delete(index, doc_id or "")
+                    return result.pop("status", 200), result
+
+                result = self._write(
+                    index,
+                    doc_id,
+                    json_body(),
+                    "create" if endpoint == "_create" or params.get("op_type") == "create" else "index",
+                )
+                return (201 if result["result"] == "created" else 200), result
+
+            if index and endpoint == "_update":
+                return 200, self._update(index, parts[2], json_body())
+
+            if index and endpoint == "_mapping":
+                if method == "PUT":
+                    for name in self._resolve_indices(index):
+                        _merge(
+                            self._index(name).mappings.setdefault("properties", {}),
+                            json_body().get("properties", {}),
+                        )
+
+                    return 200, {"acknowledged": True}
+
+                return 200, {
+                    name: {"mappings": self._index(name).mappings}
+                    for name in self._resolve_indices(index)
+                }
+
+            if index and endpoint is None:
+                if method == "HEAD":
+                    return (200 if index in self.indices else 404), None
+                if method == "PUT":
+                    if index in self.indices:
+                        raise RequestError(
+                            400, "resource_already_exists_exception", f"index [{index}] already exists"
+                        )
+
+                    self._index(index, create=True).mappings = json_body().get("mappings", {})
+                    return 200, {"acknowledged": True, "index": index}
+                if method == "DELETE":
+                    self._index(index)
+                    del self.indices[index]
+                    return 200, {"acknowledged": True}
+                if method == "GET":
+                    return 200, {
+                        name: {"mappings": self._index(name).mappings}
+                        for name in self._resolve_indices(index)
+                    }
+
+        raise RequestError(
+            400,
+            "illegal_argument_exception",
+            f"{method} {url.path} isn't supported by the in-memory stand-in",
+        )
+
+
+def _merge(target: dict[str, Any], changes: dict[str, Any]) -> None:
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class NodeResponse(NamedTuple):
+    """The response of a transport node, which the transport reads the meta and raw body of"""
+
+    meta: ApiResponseMeta
+    body: bytes
+
+
+class InMemoryNode(BaseNode):
+    """Transport node answering requests from an in-memory cluster, shared by all nodes with the same host and port"""
+
+    clusters: ClassVar[dict[str, InMemoryCluster]] = {}
+
+    def __init__(self, config: NodeConfig):
+        super().__init__(config)
+        self.cluster = self.get_cluster(config.host, config.port)
+
+    @classmethod
+    def get_cluster(cls, host: str = "localhost", port: int = 9200) -> InMemoryCluster:
+        return cls.clusters.setdefault(f"{host}:{port}", InMemoryCluster())
+
+    # The transport only reads the fields of the response tuple, so a public equivalent of NodeApiResponse is returned
+    def perform_request(  # type: ignore[override]
+        self,
+        method: str,
+        target: str,
+        body: bytes | None = None,
+        headers: HttpHeaders | None = None,
+        request_timeout: DefaultType | float | None = DEFAULT,
+    ) -> NodeResponse:
+        start = perf_counter()
+
+        if body and headers and headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+
+        try:
+            status, response = self.cluster.handle(method, target, body)
+        except RequestError as e:
+            status, response = e.status, e.body()
+
+        response_body = b"" if method == "HEAD" or response is None else json.dumps(response).encode()
+
+        return NodeResponse(
+            ApiResponseMeta(
+                status=status,
+                http_version="1.1",
+                headers=HttpHeaders(
+                    {
+                        "content-type": "application/json",
+                        "content-length": str(len(response_body)),
+                        "x-elastic-product": "Elasticsearch",
+                    }
+                ),
+                duration=perf_counter() - start,
+                node=self.config,
+            ),
+            response_body,
+        )
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,171 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import threading
+from typing import Any
+
+from elastic_transport import ObjectApiResponse
+
+
+@dataclass
+class OperationMetrics:
+    """Measurements for a single call to a public ElasticDB method. All times are in seconds"""
+
+    operation: str
+    index: str
+    wall_time: float = 0
+    failed: bool = False
+
+    requests: int = 0
+    es_took: float = 0
+    response_bytes: int = 0
+    hit_count: int = 0
+
+    validation_time: float = 0
+    invalid_count: int = 0
+
+    document_count: int = 0
+    # Summed over the worker processes, so it can exceed the wall time
+    stage_timings: dict[str, float] = field(default_factory=dict)
+
+    def record_response(self, response: ObjectApiResponse[Any]) -> None:
+        self.requests += 1
+
+        body = response.body
+
+        if "took" in body:
+            self.es_took += body["took"] / 1000
+
+        if "hits" in body:
+            self.hit_count += len(body["hits"]["hits"])
+
+        content_length = response.meta.headers.get("content-length")
+
+        if content_length:
+            self.response_bytes += int(content_length)
+
+    def record_stages(self, stage_timings: dict[str, float]) -> None:
+        for stage, seconds in stage_timings.items():
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0) + seconds
+
+
+MetricsCallback = Callable[[OperationMetrics], None]
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class MetricsRegistry:
+    """
+    Aggregates OperationMetrics into counters and a wall time histogram, which can be rendered in the Prometheus text format.
+    Register an instance as a metrics callback on the ElasticDB clients to be monitored.
+    """
+
+    counters: dict[str, str] = {
+        "operations_total": "Number of calls to ElasticDB methods",
+        "operation_failures_total": "Number of calls to ElasticDB methods which raised an exception",
+        "requests_total": "Number of search requests sent to Elasticsearch",
+        "es_took_seconds_total": "Time spent executing searches as reported by Elasticsearch",
+        "response_bytes_total": "Size of the search responses received from Elasticsearch",
+        "hits_total": "Number of search hits returned by Elasticsearch",
+        "validation_seconds_total": "Time spent validating search hits as documents",
+        "invalid_documents_total": "Number of search hits which failed validation",
+        "documents_total": "Number of documents sent to Elasticsearch",
+        "stage_seconds_total": "Time spent in each pre-pipeline stage when writing documents",
+    }
+
+    def __init__(
+        self,
+        namespace: str = "osinter_elastic",
+        buckets: tuple[float, ...] = (
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.25,
+            0.5,
+            1,
+            2.5,
+            5,
+            10,
+            30,
+        ),
+    ) -> None:
+        self.namespace = namespace
+        self.buckets = buckets
+
+        self._values: dict[str, dict[Labels, float]] = {name: {} for name in self.counters}
+        self._histograms: dict[Labels, tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _inc(self, name: str, labels: Labels, value: float = 1) -> None:
+        self._values[name][labels] = self._values[name].get(labels, 0) + value
+
+    def __call__(self, metrics: OperationMetrics) -> None:
+        labels: Labels = (("index", metrics.index), ("operation", metrics.operation))
+
+        with self._lock:
+            self._inc("operations_total", labels)
+            self._inc("operation_failures_total", labels, int(metrics.failed))
+            self._inc("requests_total", labels, metrics.requests)
+            self._inc("es_took_seconds_total", labels, metrics.es_took)
+            self._inc("response_bytes_total", labels, metrics.response_bytes)
+            self._inc("hits_total", labels, metrics.hit_count)
+            self._inc("validation_seconds_total", labels, metrics.validation_time)
+            self._inc("invalid_documents_total", labels, metrics.invalid_count)
+            self._inc("documents_total", labels, metrics.document_count)
+
+            for stage, seconds in metrics.stage_timings.items():
+                self._inc("stage_seconds_total", (*labels, ("stage", stage)), seconds)
+
+            counts, total, count = self._histograms.get(
+                labels, ([0] * len(self.buckets), 0, 0)
+            )
+
+            for i, bound in enumerate(self.buckets):
+                if metrics.wall_time <= bound:
+                    counts[i] += 1
+
+            self._histograms[labels] = (counts, total + metrics.wall_time, count + 1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {name: {} for name in self.counters}
+            self._histograms = {}
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        with self._lock:
+            for name, description in self.counters.items():
+                metric = f"{self.namespace}_{name}"
+
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} counter")
+
+                for labels, value in self._values[name].items():
+                    lines.append(f"{metric}{{{_format_labels(labels)}}} {value:g}")
+
+            metric = f"{self.namespace}_operation_seconds"
+
+            lines.append(f"# HELP {metric} Wall time of calls to ElasticDB methods")
+            lines.append(f"# TYPE {metric} histogram")
+
+            for labels, (counts, total, count) in self._histograms.items():
+                for bound, bucket_count in zip(self.buckets, counts):
+                    bucket_labels = _format_labels((*labels, ("le", f"{bound:g}")))
+                    lines.append(f"{metric}_bucket{{{bucket_labels}}} {bucket_count}")
+
+                lines.append(
+                    f'{metric}_bucket{{{_format_labels((*labels, ("le", "+Inf")))}}} {count}'
+                )
+                lines.append(f"{metric}_sum{{{_format_labels(labels)}}} {total:g}")
+                lines.append(f"{metric}_count{{{_format_labels(labels)}}} {count}")
+
+        return "\n".join(lines) + "\n"
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import TypedDict
 
 
@@ -23,3 +24,9 @@ class SignificantTermAgg(TypedDict):
     doc_count: int
     bg_count: int
     buckets: list[SignificantTermAggBucket]
+
+
+class DateHistogram(TypedDict):
+    timestamps: list[datetime]
+    total: list[int]
+    series: dict[str, list[int]]
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Any
+
+from ..objects import BaseArticle, FullArticle, PartialArticle
+from .client import ElasticDB
+from .queries import ArticleSearchQuery
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+ML_FIELDS = ["ml.coordinates", "ml.cluster", "ml.labels"]
+
+
+@dataclass
+class MLProjection:
+    """
+    The ML attributes of a set of articles as arrays, where row i of every array belongs to the article with ID ids[i].
+    Clusters are stored as codes into `clusters`, with -1 for articles without a cluster.
+    """
+
+    ids: list[str]
+    coordinates: "np.ndarray[Any, np.dtype[np.float32]]"
+    cluster_codes: "np.ndarray[Any, np.dtype[np.int32]]"
+    clusters: list[str]
+    labels: list[list[str]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def cluster_mask(self, cluster: str) -> "np.ndarray[Any, np.dtype[np.bool_]]":
+        if cluster not in self.clusters:
+            return np.zeros(len(self.ids), dtype=np.bool_)
+
+        mask: np.ndarray[Any, np.dtype[np.bool_]] = (
+            self.cluster_codes == self.clusters.index(cluster)
+        )
+        return mask
+
+
+def project_ml(
+    client: ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery],
+    search_q: ArticleSearchQuery | None = None,
+    batch_size: int = 10_000,
+) -> MLProjection:
+    """
+    Loads the coordinates, clusters and labels of the matching articles without parsing their source or validating them as documents.
+    The values are read through the fields API with the source disabled. Docvalue fields isn't used, as they return the coordinates sorted instead of as [x, y].
+    """
+    if np is None:
+        raise ImportError("ML projections requires numpy to be installed")
+
+    if not search_q:
+        search_q = ArticleSearchQuery(limit=0)
+
+    query = search_q.generate_es_query(client.elser_model_id, False)
+
+    for key in ["source_includes", "source_excludes", "highlight"]:
+        query.pop(key, None)
+
+    query["source"] = False
+    query["fields"] = ML_FIELDS
+
+    ids: list[str] = []
+    coordinates: list[float] = []
+    cluster_codes: list[int] = []
+    clusters: dict[str, int] = {}
+    labels: list[list[str]] = []
+
+    for hits in client.query_hits(query, batch_size=batch_size, operation="project_ml"):
+        for hit in hits:
+            fields = hit.get("fields", {})
+
+            ids.append(hit["_id"])
+            coordinates.extend(fields.get("ml.coordinates") or [0.0, 0.0])
+            labels.append(fields.get("ml.labels", []))
+
+            cluster = fields.get("ml.cluster", [""])[0]
+
+            if cluster:
+                cluster_codes.append(clusters.setdefault(cluster, len(clusters)))
+            else:
+                cluster_codes.append(-1)
+
+    return MLProjection(
+        ids=ids,
+        coordinates=np.array(coordinates, dtype=np.float32).reshape(-1, 2),
+        cluster_codes=np.array(cluster_codes, dtype=np.int32),
+        clusters=list(clusters),
+        labels=labels,
+    )
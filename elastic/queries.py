@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 
+import base64
 from collections.abc import Set
 from dataclasses import dataclass
 from datetime import datetime
+import json
 from typing import (
     Any,
     ClassVar,
@@ -23,6 +25,33 @@ class SearchFields(TypedDict):
     highlight_fragments: bool
 
 
+def encode_cursor(sort_values: list[Any]) -> str:
+    """Packs the sort values of the last hit on a page into an opaque, URL-safe cursor"""
+    return (
+        base64.urlsafe_b64encode(json.dumps(sort_values, separators=(",", ":")).encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        sort_values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except ValueError:
+        raise ValueError(f'The cursor "{cursor}" is invalid')
+
+    if not isinstance(sort_values, list):
+        raise ValueError(f'The cursor "{cursor}" is invalid')
+
+    return sort_values
+
+
+FACET_PREFIX = "facet_"
+FILTERED_AGGREGATIONS = "filtered_aggregations"
+
+
 @dataclass
 class SearchQuery(ABC):
     limit: int = 10_000
@@ -45,16 +74,23 @@ class SearchQuery(ABC):
     custom_exclude_fields: list[str] | None = None
     aggregations: dict[str, Any] | None = None
 
+    cursor: str | None = None
+
+    facets: list[str] | None = None
+
     search_fields: ClassVar[list[SearchFields]] = []
     essential_fields: ClassVar[list[str]] = []
     exclude_fields: ClassVar[list[str]] = []
     semantic_fields: ClassVar[list[SemanticSearchField]] = []
+    facet_aggregations: ClassVar[dict[str, dict[str, Any]]] = {}
 
     @abstractmethod
     def generate_es_query(
         self, elser_id: str | None, completeness: bool | list[str]
     ) -> dict[str, Any]:
-        if self.aggregations and (self.limit < 1 or self.limit > 10000):
+        if (self.aggregations or self.facets) and (
+            self.limit < 1 or self.limit > 10000
+        ):
             raise Exception("Aggregations are not allowed with large searches")
 
         query: dict[str, Any] = {
@@ -143,6 +179,29 @@ class SearchQuery(ABC):
         if self.aggregations:
             query["aggs"] = self.aggregations
 
+        facet_filters = self.generate_facet_filters()
+
+        if self.facets:
+            # Filters belonging to a facet are applied after aggregating, so that selecting a value doesn't collapse the counts for the other values of the same facet
+            if facet_filters:
+                query["post_filter"] = {"bool": {"filter": list(facet_filters.values())}}
+
+                # The post filter doesn't apply to aggregations, so the other aggregations are nested in a filter aggregation with the facet filters
+                if "aggs" in query:
+                    query["aggs"] = {
+                        FILTERED_AGGREGATIONS: {
+                            "filter": query["post_filter"],
+                            "aggs": query["aggs"],
+                        }
+                    }
+
+            query["aggs"] = {
+                **query.get("aggs", {}),
+                **self.generate_facet_aggregations(facet_filters),
+            }
+        else:
+            query["query"]["bool"]["filter"].extend(facet_filters.values())
+
         if self.highlight:
             query["highlight"] = {
                 "pre_tags": [self.highlight_symbol],
@@ -165,6 +224,91 @@ class SearchQuery(ABC):
 
         return query
 
+    def generate_facet_filters(self) -> dict[str, dict[str, Any]]:
+        """Returns the filters for the currently selected facet values, keyed by facet name"""
+        return {}
+
+    def generate_facet_aggregations(
+        self, facet_filters: dict[str, dict[str, Any]]
+    ) -> dict[str, Any]:
+        aggregations: dict[str, Any] = {}
+
+        for facet in self.facets or []:
+            if facet not in self.facet_aggregations:
+                raise Exception(
+                    f'Unknown facet "{facet}", available facets are: {", ".join(self.facet_aggregations)}'
+                )
+
+            aggregations[FACET_PREFIX + facet] = {
+                "filter": {
+                    "bool": {
+                        "filter": [
+                            facet_filter
+                            for name, facet_filter in facet_filters.items()
+                            if name != facet
+                        ]
+                    }
+                },
+                "aggs": {"facet": self.facet_aggregations[facet]},
+            }
+
+        return aggregations
+
+    def parse_aggregations(self, aggregations: dict[str, Any]) -> dict[str, Any]:
+        """Returns the aggregations from a search response with the requested aggregations moved out of the facet filter aggregation again"""
+        if FILTERED_AGGREGATIONS not in aggregations:
+            return aggregations
+
+        filtered = aggregations[FILTERED_AGGREGATIONS]
+
+        return {
+            **{
+                name: aggregation
+                for name, aggregation in aggregations.items()
+                if name != FILTERED_AGGREGATIONS
+            },
+            **{
+                name: aggregation
+                for name, aggregation in filtered.items()
+                if name != "doc_count"
+            },
+        }
+
+    def parse_facets(self, aggregations: dict[str, Any]) -> dict[str, dict[str, int]]:
+        """Converts the facet aggregations from a search response into value counts keyed by facet name"""
+        facets: dict[str, dict[str, int]] = {}
+
+        for facet in self.facets or []:
+            buckets = aggregations[FACET_PREFIX + facet]["facet"]["buckets"]
+
+            # Filters aggregations returns keyed buckets, while terms aggregations returns a list
+            if isinstance(buckets, dict):
+                facets[facet] = {key: bucket["doc_count"] for key, bucket in buckets.items()}
+            else:
+                facets[facet] = {
+                    bucket["key"]: bucket["doc_count"] for bucket in buckets
+                }
+
+        return facets
+
+    def generate_paginated_es_query(
+        self, elser_id: str | None, completeness: bool | list[str], tiebreaker: str
+    ) -> dict[str, Any]:
+        """Generates a query for a single page, continuing after the page the cursor points to"""
+        if self.limit < 1 or self.limit > 10_000:
+            raise Exception("Cursor pagination requires a limit between 1 and 10.000")
+
+        query = self.generate_es_query(elser_id, completeness)
+
+        # The tiebreaker has to be unique, as documents sharing sort values with the last hit on a page would otherwise be skipped
+        query["sort"] = [sort for sort in query["sort"] if sort != "_doc"]
+        query["sort"].append({tiebreaker: "asc"})
+
+        if self.cursor:
+            query["search_after"] = decode_cursor(self.cursor)
+
+        return query
+
 
 @dataclass
 class ClusterSearchQuery(SearchQuery):
@@ -291,7 +435,30 @@ class ArticleSearchQuery(SearchQuery):
         },
         {"field": "embeddings.title.elser.tokens", "nested_path": None, "boost": 1},
     ]
-    exclude_fields: ClassVar[list[str]] = ["embeddings"]
+    exclude_fields: ClassVar[list[str]] = ["embeddings", "content_hashes"]
+    facet_aggregations = {
+        "sources": {"terms": {"field": "profile", "size": 500}},
+        "auto_tags": {"terms": {"field": "tags.automatic", "size": 50}},
+        "interesting_tags": {"terms": {"field": "tags.interesting.values", "size": 50}},
+        "clusters": {"terms": {"field": "ml.cluster", "size": 50}},
+        "classifications": {
+            "filters": {
+                "filters": {
+                    classification: {
+                        "term": {f"ml.classification.{classification}": True}
+                    }
+                    for classification in [
+                        "incident",
+                        "campaign",
+                        "vulnerability",
+                        "threat_actor",
+                        "research",
+                        "malware",
+                    ]
+                }
+            }
+        },
+    }
 
     def generate_es_query(
         self, elser_id: str | None, completeness: bool | list[str] = False
@@ -300,11 +467,6 @@ class ArticleSearchQuery(SearchQuery):
             elser_id, completeness
         )
 
-        if self.sources:
-            query["query"]["bool"]["filter"].append(
-                {"terms": {"profile": [source.lower() for source in self.sources]}}
-            )
-
         if self.exclude_sources:
             query["query"]["bool"]["must_not"].append(
                 {
@@ -314,14 +476,24 @@ class ArticleSearchQuery(SearchQuery):
                 }
             )
 
+        return query
+
+    def generate_facet_filters(self) -> dict[str, dict[str, Any]]:
+        facet_filters: dict[str, dict[str, Any]] = {}
+
+        if self.sources:
+            facet_filters["sources"] = {
+                "terms": {"profile": [source.lower() for source in self.sources]}
+            }
+
         if self.cluster_id is not None:
-            query["query"]["bool"]["filter"].append(
-                {"term": {"ml.cluster": {"value": self.cluster_id}}}
-            )
+            facet_filters["clusters"] = {
+                "term": {"ml.cluster": {"value": self.cluster_id}}
+            }
 
         if self.cve is not None:
-            query["query"]["bool"]["filter"].append(
-                {"term": {"tags.interesting.values": {"value": self.cve}}}
-            )
+            facet_filters["interesting_tags"] = {
+                "term": {"tags.interesting.values": {"value": self.cve}}
+            }
 
-        return query
+        return facet_filters
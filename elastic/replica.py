@@ -0,0 +1,170 @@
+import json
+import os
+from typing import Any
+
+from .client import ElasticDB
+from .columnar import hits_to_record_batch, index_mapping, index_schema
+from .queries import SearchQuery
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+
+class LocalReplica:
+    """
+    Local copy of an index, kept up to date from the change feed of ElasticDB.
+    By default the feed follows the updated_at field, so updated documents are fetched again, and only their latest version is read.
+    Every sync appends the changed documents as a new Arrow IPC delta file, and the state file records the watermark along with the deltas.
+    An interrupted sync leaves the state untouched, so the next sync starts over from the last completed one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: list[str] | None = None,
+        exclude: list[str] | None = None,
+        field: str = "updated_at",
+    ) -> None:
+        if pa is None:
+            raise ImportError("The local replica requires pyarrow to be installed")
+
+        self.path = path
+        self.field = field
+
+        os.makedirs(path, exist_ok=True)
+
+        self.state: dict[str, Any] = {
+            "watermark": None,
+            "deltas": [],
+            "columns": columns,
+            "exclude": exclude,
+            "field": field,
+        }
+
+        if os.path.isfile(self._state_path):
+            with open(self._state_path) as f:
+                state = json.load(f)
+
+            if (state["columns"], state["exclude"], state["field"]) != (
+                columns,
+                exclude,
+                field,
+            ):
+                raise Exception(
+                    f'The replica at "{path}" was created with different columns or change field'
+                )
+
+            self.state = state
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.path, "state.json")
+
+    @property
+    def watermark(self) -> str | None:
+        watermark: str | None = self.state["watermark"]
+        return watermark
+
+    def delta_paths(self) -> list[str]:
+        return [os.path.join(self.path, name) for name in self.state["deltas"]]
+
+    def _save_state(self) -> None:
+        with open(f"{self._state_path}.tmp", "w") as f:
+            json.dump(self.state, f)
+
+        os.replace(f"{self._state_path}.tmp", self._state_path)
+
+    def sync(
+        self,
+        client: ElasticDB[Any, Any, Any, Any],
+        search_q: SearchQuery | None = None,
+        batch_size: int = 10_000,
+        lag: float = 300,
+    ) -> int:
+        """
+        Fetches the documents changed since the last sync into a new delta file, and returns the number of documents fetched.
+        Changes from the last `lag` seconds are left for the next sync, see ElasticDB.query_changes.
+        """
+        schema = index_schema(
+            index_mapping(client),
+            client.document_object_class["full"],
+            self.state["columns"],
+            self.state["exclude"],
+        )
+
+        name = f"delta-{len(self.state['deltas']) + 1:06d}.arrow"
+        temporary_path = os.path.join(self.path, f"{name}.tmp")
+
+        watermark = self.watermark
+        fetched = 0
+
+        with pa.ipc.new_file(temporary_path, schema) as writer:
+            for hits, watermark in client.query_change_hits(
+                watermark, search_q, self.field, batch_size, lag
+            ):
+                writer.write_batch(hits_to_record_batch(hits, schema))
+                fetched += len(hits)
+
+        if not fetched:
+            os.remove(temporary_path)
+            return 0
+
+        os.replace(temporary_path, os.path.join(self.path, name))
+
+        self.state["deltas"].append(name)
+        self.state["watermark"] = watermark
+        self._save_state()
+
+        return fetched
+
+    def read(self, deduplicate: bool = True) -> "pa.Table":
+        """
+        Returns the replicated documents, memory mapped from the delta files.
+        Documents changed several times are only included in their latest version, unless `deduplicate` is disabled.
+        """
+        tables: list[pa.Table] = []
+
+        for delta_path in self.delta_paths():
+            with pa.memory_map(delta_path) as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+
+        if not tables:
+            schema = pa.schema([pa.field("id", pa.string(), nullable=False)])
+            return schema.empty_table()
+
+        if not deduplicate:
+            return pa.concat_tables(tables)
+
+        seen = pa.array([], pa.string())
+        latest: list[pa.Table] = []
+
+        for table in reversed(tables):
+            table = table.filter(pc.invert(pc.is_in(table["id"], value_set=seen)))
+            latest.append(table)
+            seen = pa.concat_arrays([seen, table["id"].combine_chunks()])
+
+        return pa.concat_tables(reversed(latest))
+
+    def compact(self) -> None:
+        """Merges the delta files into a single one, only keeping the latest version of every document"""
+        if len(self.state["deltas"]) < 2:
+            return
+
+        table = self.read()
+        previous = self.delta_paths()
+
+        name = f"delta-{len(self.state['deltas']) + 1:06d}.arrow"
+
+        with pa.ipc.new_file(os.path.join(self.path, f"{name}.tmp"), table.schema) as writer:
+            writer.write_table(table)
+
+        os.replace(os.path.join(self.path, f"{name}.tmp"), os.path.join(self.path, name))
+
+        self.state["deltas"] = [name]
+        self._save_state()
+
+        for delta_path in previous:
+            os.remove(delta_path)
@@ -0,0 +1,34 @@
+from typing import Any
+
+from elastic_transport import Serializer
+from elasticsearch.serializer import NdjsonSerializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+class OrjsonNdjsonSerializer(NdjsonSerializer):
+    """NDJSON serializer for bulk bodies, encoding the lines which aren't already bytes with orjson"""
+
+    def json_dumps(self, data: Any) -> bytes:
+        return orjson.dumps(
+            data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+
+    def json_loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+def fast_serializers() -> dict[str, Serializer]:
+    """Returns orjson based serializers for the Elasticsearch client when orjson is installed, and otherwise none to keep the defaults"""
+    if orjson is None:
+        return {}
+
+    from elasticsearch.serializer import OrjsonSerializer
+
+    return {
+        OrjsonSerializer.mimetype: OrjsonSerializer(),
+        OrjsonNdjsonSerializer.mimetype: OrjsonNdjsonSerializer(),
+    }
@@ -0,0 +1,118 @@
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import logging
+import random
+import threading
+from typing import Any
+
+logger = logging.getLogger("osinter")
+
+# Parts of a query which differ between otherwise identical requests
+VOLATILE_QUERY_KEYS = {"pit", "search_after", "profile"}
+
+
+def canonical_query(query: dict[str, Any]) -> str:
+    """Serializes a search request deterministically, leaving out point in time IDs, cursors and profiling so repeated queries can be grouped"""
+    return json.dumps(
+        {key: value for key, value in query.items() if key not in VOLATILE_QUERY_KEYS},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+@dataclass
+class SlowQuery:
+    timestamp: datetime
+    operation: str
+    index: str
+    query: str
+    wall_time: float
+    es_took: float | None
+    hit_count: int
+    # The "shards" section of an Elasticsearch profile, when the query was profiled
+    profile: list[dict[str, Any]] | None = None
+
+    def shard_timings(self) -> dict[str, float]:
+        """Returns the time spent in query and aggregation execution per shard, in seconds"""
+        timings: dict[str, float] = {}
+
+        for shard in self.profile or []:
+            nanos = sum(
+                query["time_in_nanos"]
+                for search in shard.get("searches", [])
+                for query in search.get("query", [])
+            ) + sum(agg["time_in_nanos"] for agg in shard.get("aggregations", []))
+
+            timings[shard["id"]] = nanos / 1_000_000_000
+
+        return timings
+
+
+class SlowQueryLog:
+    """
+    Keeps the most recent searches which took longer than `threshold` seconds, and logs them as warnings.
+    A `profile_sample_rate` share of all searches is sent with profiling enabled, while `profile_slow_queries` re-runs slow searches which wasn't sampled with profiling, to capture where Elasticsearch spent the time.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 1.0,
+        max_entries: int = 100,
+        profile_sample_rate: float = 0,
+        profile_slow_queries: bool = False,
+    ) -> None:
+        self.threshold = threshold
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_slow_queries = profile_slow_queries
+
+        self.entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def sample_profile(self) -> bool:
+        return self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+
+    def is_slow(self, wall_time: float) -> bool:
+        return wall_time >= self.threshold
+
+    def record(
+        self,
+        operation: str,
+        index: str,
+        query: dict[str, Any],
+        wall_time: float,
+        response: dict[str, Any],
+        profile: dict[str, Any] | None = None,
+    ) -> SlowQuery:
+        profile = profile or response.get("profile")
+
+        entry = SlowQuery(
+            timestamp=datetime.now(timezone.utc),
+            operation=operation,
+            index=index,
+            query=canonical_query(query),
+            wall_time=wall_time,
+            es_took=response["took"] / 1000 if "took" in response else None,
+            hit_count=len(response["hits"]["hits"]) if "hits" in response else 0,
+            profile=profile["shards"] if profile else None,
+        )
+
+        with self._lock:
+            self.entries.append(entry)
+
+        logger.warning(
+            f'Slow query for operation "{operation}" on index "{index}" took {wall_time:.3f}s'
+            f'{f" ({entry.es_took:.3f}s in Elasticsearch)" if entry.es_took is not None else ""}: {entry.query}'
+        )
+
+        return entry
+
+    def slowest(self, n: int = 10) -> list[SlowQuery]:
+        with self._lock:
+            return sorted(self.entries, key=lambda entry: entry.wall_time, reverse=True)[:n]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
@@ -0,0 +1,370 @@
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import functools
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Any
+
+from elasticsearch import Elasticsearch
+
+from .client import ElasticDB, create_document_operation, update_timestamp
+from .columnar import index_mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger("osinter")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _dumps(data: Any) -> bytes:
+    return orjson.dumps(data) if orjson else json.dumps(data).encode()
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson else json.loads(line)
+
+
+def _write_json(path: str, data: Any) -> None:
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f, indent=2)
+
+    os.replace(f"{path}.tmp", path)
+
+
+def _leaf_types(properties: dict[str, Any], prefix: str = "") -> dict[str, str]:
+    types: dict[str, str] = {}
+
+    for name, mapping in properties.items():
+        path = f"{prefix}{name}"
+
+        if "properties" in mapping:
+            types.update(_leaf_types(mapping["properties"], f"{path}."))
+
+            if mapping.get("type") == "nested":
+                types[path] = "nested"
+        elif "type" in mapping:
+            types[path] = mapping["type"]
+
+    return types
+
+
+def check_mapping(expected: dict[str, Any], actual: dict[str, Any], name: str) -> None:
+    """Raises if a field in the expected mapping is missing from, or has another type in, the actual one"""
+    expected_types = _leaf_types(expected.get("properties", {}))
+    actual_types = _leaf_types(actual.get("properties", {}))
+
+    problems = [
+        f'"{path}" is {actual_types[path]} instead of {es_type}'
+        if path in actual_types
+        else f'"{path}" is missing'
+        for path, es_type in expected_types.items()
+        if actual_types.get(path) != es_type
+    ]
+
+    if problems:
+        raise Exception(
+            f"The mapping of {name} doesn't match ES_INDEX_CONFIGS: {', '.join(problems)}"
+        )
+
+
+def _get_mapping(es: Elasticsearch, index_name: str) -> dict[str, Any]:
+    # Aliases resolve to the concrete index, so the single entry in the response is used
+    response = es.indices.get_mapping(index=index_name)
+    mapping: dict[str, Any] = next(iter(response.body.values()))["mappings"]
+    return mapping
+
+
+def _dump_slice(
+    client: ElasticDB[Any, Any, Any, Any],
+    pit_id: str,
+    slice_id: int,
+    slices: int,
+    path: str,
+    batch_size: int,
+    pit_keep_alive: str,
+) -> int:
+    query: dict[str, Any] = {"size": 0, "sort": ["_shard_doc"]}
+
+    if slices > 1:
+        query["slice"] = {"id": slice_id, "max": slices}
+
+    dumped = 0
+
+    with gzip.open(f"{path}.tmp", "wb", compresslevel=6) as f:
+        for hits in client.query_hits(
+            query,
+            batch_size=batch_size,
+            pit_id=pit_id,
+            pit_keep_alive=pit_keep_alive,
+            operation="dump",
+        ):
+            f.write(
+                b"".join(
+                    _dumps({"_id": hit["_id"], "_source": hit["_source"]}) + b"\n"
+                    for hit in hits
+                )
+            )
+            dumped += len(hits)
+
+    os.replace(f"{path}.tmp", path)
+
+    return dumped
+
+
+def dump(
+    client: ElasticDB[Any, Any, Any, Any],
+    destination: str,
+    slices: int = 4,
+    batch_size: int = 1000,
+    pit_keep_alive: str = "5m",
+) -> dict[str, Any]:
+    """
+    Writes every document in the index to gzipped NDJSON shards in `destination`, scanning the shards in parallel with a sliced point in time.
+    The manifest records the mapping and which shards are complete, so an interrupted dump only redoes the incomplete shards when called again.
+    As a new point in time is used when resuming, documents changed in between can end up in the resumed shards inconsistently.
+    """
+    expected_mapping = index_mapping(client)
+    actual_mapping = _get_mapping(client.es, client.index_name)
+
+    check_mapping(expected_mapping, actual_mapping, f'index "{client.index_name}"')
+
+    os.makedirs(destination, exist_ok=True)
+    manifest_path = os.path.join(destination, MANIFEST_NAME)
+
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as f:
+            manifest: dict[str, Any] = json.load(f)
+
+        if (manifest["index"], len(manifest["shards"])) != (client.index_name, slices):
+            raise Exception(
+                f'"{destination}" contains a dump of another index or with another number of slices'
+            )
+    else:
+        manifest = {
+            "index": client.index_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "mapping": actual_mapping,
+            "shards": [
+                {"file": f"shard-{i:04d}.ndjson.gz", "complete": False, "documents": 0}
+                for i in range(slices)
+            ],
+        }
+
+        _write_json(manifest_path, manifest)
+
+    pending = [i for i, shard in enumerate(manifest["shards"]) if not shard["complete"]]
+
+    if not pending:
+        return manifest
+
+    pit_id = client.open_point_in_time(pit_keep_alive)
+
+    manifest_lock = threading.Lock()
+
+    def run(slice_id: int) -> None:
+        shard = manifest["shards"][slice_id]
+
+        documents = _dump_slice(
+            client,
+            pit_id,
+            slice_id,
+            slices,
+            os.path.join(destination, shard["file"]),
+            batch_size,
+            pit_keep_alive,
+        )
+
+        with manifest_lock:
+            shard.update({"complete": True, "documents": documents})
+            _write_json(manifest_path, manifest)
+
+        logger.info(f'Dumped {documents} documents to "{shard["file"]}"')
+
+    try:
+        with ThreadPoolExecutor(len(pending)) as executor:
+            for future in [executor.submit(run, slice_id) for slice_id in pending]:
+                future.result()
+    finally:
+        client.close_point_in_time(pit_id)
+
+    return manifest
+
+
+def _read_shard(path: str) -> Generator[tuple[str, dict[str, Any]], None, None]:
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                document = _loads(line)
+                yield document["_id"], document["_source"]
+
+
+def restore(
+    client: ElasticDB[Any, Any, Any, Any],
+    source: str,
+    thread_count: int = 4,
+    chunk_size: int = 500,
+    use_pipeline: bool = False,
+    use_pre_pipelines: bool = False,
+    create_index: bool = True,
+) -> int:
+    """
+    Loads a dump into the index of `client` with parallel bulk requests, creating the index from ES_INDEX_CONFIGS if needed.
+    Documents are indexed as they were dumped, unless the ingest pipeline or the pre-pipelines are requested.
+    Restored shards are recorded next to the dump, so an interrupted restore continues with the remaining shards.
+    """
+    with open(os.path.join(source, MANIFEST_NAME)) as f:
+        manifest: dict[str, Any] = json.load(f)
+
+    if not all(shard["complete"] for shard in manifest["shards"]):
+        raise Exception(f'The dump in "{source}" is incomplete')
+
+    expected_mapping = index_mapping(client)
+    check_mapping(expected_mapping, manifest["mapping"], f'the dump in "{source}"')
+
+    if client.es.indices.exists(index=client.index_name):
+        check_mapping(
+            expected_mapping,
+            _get_mapping(client.es, client.index_name),
+            f'index "{client.index_name}"',
+        )
+    elif create_index:
+        client.es.indices.create(index=client.index_name, mappings=expected_mapping)
+    else:
+        raise Exception(f'The index "{client.index_name}" doesn\'t exist')
+
+    state_path = os.path.join(source, f"restore-{client.index_name}.json")
+    completed: list[str] = []
+
+    if os.path.isfile(state_path):
+        with open(state_path) as f:
+            completed = json.load(f)["completed"]
+
+    pipeline = client.ingest_pipeline if use_pipeline else None
+    restored = 0
+
+    for shard in manifest["shards"]:
+        if shard["file"] in completed:
+            continue
+
+        documents = _read_shard(os.path.join(source, shard["file"]))
+
+        if use_pre_pipelines:
+            with multiprocessing.Pool(max(multiprocessing.cpu_count() - 2, 1)) as pool:
+                restored += client.bulk(
+                    pool.imap(
+                        functools.partial(
+                            create_document_operation,
+                            index_name=client.index_name,
+                            elser_model_id=client.elser_model_id,
+                            pipeline=pipeline,
+                            pre_pipelines=client.pre_pipelines,
+                            hash_signatures=client.hash_signatures(use_pipeline, True),
+                        ),
+                        (
+                            client.document_object_class["full"].model_validate(
+                                {**document, "id": id}
+                            )
+                            for id, document in documents
+                        ),
+                        200,
+                    ),
+                    thread_count,
+                    chunk_size,
+                )
+        else:
+            restored += client.bulk(
+                (
+                    {
+                        "_index": client.index_name,
+                        "_id": id,
+                        "_source": document,
+                        **({"pipeline": pipeline} if pipeline else {}),
+                    }
+                    for id, document in documents
+                ),
+                thread_count,
+                chunk_size,
+            )
+
+        completed.append(shard["file"])
+        _write_json(state_path, {"completed": completed})
+
+        logger.info(f'Restored "{shard["file"]}" into "{client.index_name}"')
+
+    return restored
+
+
+def migrate_index(
+    client: ElasticDB[Any, Any, Any, Any], batch_size: int = 1000
+) -> int:
+    """
+    Brings an index created from an older ES_INDEX_CONFIGS up to date, and returns the number of documents changed.
+    The fields missing from the mapping are added, and the documents written before updated_at was introduced are stamped with the time they were inserted, so the change feed includes them.
+    This has to run before the first write storing content hashes, as they are otherwise mapped dynamically.
+    Fields mapped with another type can't be changed in place, and need to be reindexed into a new index created from ES_INDEX_CONFIGS.
+    """
+    expected_mapping = index_mapping(client)
+    expected_types = _leaf_types(expected_mapping["properties"])
+    actual_types = _leaf_types(
+        _get_mapping(client.es, client.index_name).get("properties", {})
+    )
+
+    conflicts = [
+        f'"{path}" is {actual_types[path]} instead of {es_type}'
+        for path, es_type in expected_types.items()
+        if path in actual_types and actual_types[path] != es_type
+    ]
+
+    # Disabled objects, like content_hashes, have no properties of their own, so dynamically mapped ones show up as their sub-fields
+    conflicts += [
+        f'"{path}" is mapped dynamically instead of {es_type}'
+        for path, es_type in expected_types.items()
+        if path not in actual_types
+        and any(actual_path.startswith(f"{path}.") for actual_path in actual_types)
+    ]
+
+    if conflicts:
+        raise Exception(
+            f'The mapping of index "{client.index_name}" can\'t be migrated in place: {", ".join(conflicts)}'
+        )
+
+    client.es.indices.put_mapping(
+        index=client.index_name, properties=expected_mapping["properties"]
+    )
+
+    query: dict[str, Any] = {
+        "size": 0,
+        "query": {"bool": {"must_not": [{"exists": {"field": "updated_at"}}]}},
+        "_source": ["inserted_at"],
+    }
+
+    migrated_at = update_timestamp()
+    migrated = 0
+
+    for hits in client.query_hits(
+        query, batch_size=batch_size, operation="migrate_index"
+    ):
+        migrated += client.bulk(
+            {
+                "_op_type": "update",
+                "_index": client.index_name,
+                "_id": hit["_id"],
+                "doc": {
+                    "updated_at": hit.get("_source", {}).get("inserted_at", migrated_at)
+                },
+            }
+            for hit in hits
+        )
+
+    logger.info(f'Migrated {migrated} documents in "{client.index_name}"')
+
+    return migrated
@@ -1,7 +1,24 @@
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+import functools
+import io
+import os
+import re
+import tarfile
+import time
+from typing import TYPE_CHECKING, Literal
+import zipfile
+
 from .objects import FullArticle
 
 from string import Template
 
+if TYPE_CHECKING:
+    from .elastic import ArticleSearchQuery, ElasticDB
+    from .objects import BaseArticle, PartialArticle
+
+ExportFormat = Literal["zip", "tar", "tar.gz", "directory"]
+
 default_template = """# $title
 ## $description
 ## Information:
@@ -27,8 +44,16 @@ $auto_tags
 default_templater = Template(default_template)
 
 
-def article_to_md(article: FullArticle) -> str:
-    return default_templater.substitute(**generate_substitution_mapping(article))
+@functools.lru_cache(maxsize=32)
+def _compile_template(template: str) -> Template:
+    return Template(template)
+
+
+def article_to_md(
+    article: FullArticle, template: str | None = None, obsidian_tags: bool = False
+) -> str:
+    templater = _compile_template(template) if template else default_templater
+    return templater.substitute(**generate_substitution_mapping(article, obsidian_tags))
 
 
 def generate_substitution_mapping(
@@ -64,3 +89,86 @@ def generate_substitution_mapping(
         "technical_tags": technical_tags,
         "auto_tags": auto_tags,
     }
+
+
+# Characters which aren't allowed in file names on common platforms, or in note names in Obsidian
+UNSAFE_FILE_NAME_CHARACTERS = re.compile(r'[\\/:*?"<>|#^\[\]\x00-\x1f]')
+
+
+def article_file_name(article: FullArticle, max_length: int = 150) -> str:
+    name = UNSAFE_FILE_NAME_CHARACTERS.sub(" ", article.title)
+    name = " ".join(name.split())[:max_length].strip(" .")
+
+    return name if name else article.id
+
+
+@contextmanager
+def open_export_writer(
+    destination: str, format: ExportFormat
+) -> Generator[Callable[[str, bytes], None], None, None]:
+    """Yields a function writing a file with the given name and content into a zip or tar archive, or a directory"""
+    if format == "directory":
+        os.makedirs(destination, exist_ok=True)
+
+        def write_file(name: str, content: bytes) -> None:
+            with open(os.path.join(destination, name), "wb") as f:
+                f.write(content)
+
+        yield write_file
+
+    elif format == "zip":
+        with zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as archive:
+
+            def write_zip(name: str, content: bytes) -> None:
+                archive.writestr(name, content)
+
+            yield write_zip
+
+    else:
+        with tarfile.open(
+            destination, "w:gz" if format == "tar.gz" else "w"
+        ) as tar_archive:
+
+            def write_tar(name: str, content: bytes) -> None:
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mtime = int(time.time())
+                tar_archive.addfile(info, io.BytesIO(content))
+
+            yield write_tar
+
+
+def export_articles_to_md(
+    article_client: "ElasticDB[BaseArticle, PartialArticle, FullArticle, ArticleSearchQuery]",
+    destination: str,
+    search_q: "ArticleSearchQuery | None" = None,
+    format: ExportFormat = "zip",
+    template: str | None = None,
+    obsidian_tags: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Renders every article matching the query as a Markdown note, for example for an Obsidian vault, and writes them to `destination`.
+    Articles are scrolled one batch at a time and written as they are rendered, so memory use is bounded by `batch_size` regardless of the number of articles.
+    Rendering is cheap compared to sending the articles to other processes, so it's done in-process.
+    Returns the number of exported articles.
+    """
+    used_names: set[str] = set()
+    exported = 0
+
+    with open_export_writer(destination, format) as write:
+        for articles in article_client.scroll_documents(search_q, batch_size=batch_size):
+            for article in articles:
+                name = article_file_name(article)
+
+                # Articles with identical titles get their ID appended to keep the notes apart
+                if name.lower() in used_names:
+                    name = f"{name} {article.id}"
+
+                used_names.add(name.lower())
+
+                markdown = article_to_md(article, template, obsidian_tags)
+                write(f"{name}.md", markdown.encode())
+                exported += 1
+
+    return exported
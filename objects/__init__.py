@@ -5,6 +5,9 @@ from .articles import (
     BaseArticle,
     PartialArticle,
     FullArticle,
+    LazyArticle,
+    ArticleBodyLoader,
+    ArticleFieldFetcher,
     MLAttributes,
     MLClassification,
     TagsOfInterest,
@@ -49,6 +52,9 @@ __all__ = [
     "BaseArticle",
     "PartialArticle",
     "FullArticle",
+    "LazyArticle",
+    "ArticleBodyLoader",
+    "ArticleFieldFetcher",
     "MLAttributes",
     "MLClassification",
     "TagsOfInterest",
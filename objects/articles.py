@@ -1,5 +1,7 @@
+from collections.abc import Callable
 from datetime import datetime, timezone
-from typing import Literal
+import threading
+from typing import Any, Literal
 from typing_extensions import Annotated
 
 from pydantic import (
@@ -8,6 +10,7 @@ from pydantic import (
     BeforeValidator,
     Field,
     HttpUrl,
+    PrivateAttr,
 )
 import annotated_types
 
@@ -82,6 +85,88 @@ class FullArticle(BaseArticle):
     content: Annotated[str, annotated_types.MinLen(10)]
 
 
+# Fetches the given fields for a list of article IDs, returning their source by ID
+ArticleFieldFetcher = Callable[[list[str], list[str]], dict[str, dict[str, Any]]]
+
+
+class ArticleBodyLoader:
+    """
+    Shared between the lazy articles of a result set, loading the heavy fields of `batch_size` articles at a time on first access.
+    The batch starts at the accessed article and continues through the following articles in the result set which haven't been loaded yet.
+    """
+
+    fields = ["content", "formatted_content"]
+
+    def __init__(
+        self, fetch: ArticleFieldFetcher, ids: list[str], batch_size: int = 100
+    ) -> None:
+        self.fetch = fetch
+        self.ids = ids
+        self.batch_size = batch_size
+
+        self.positions = {id: i for i, id in enumerate(ids)}
+        self.loaded: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, id: str) -> dict[str, Any]:
+        with self._lock:
+            if id not in self.loaded:
+                batch = [id] + [
+                    other_id
+                    for other_id in self.ids[self.positions.get(id, 0) :]
+                    if other_id not in self.loaded and other_id != id
+                ][: self.batch_size - 1]
+
+                fetched = self.fetch(batch, self.fields)
+
+                for batch_id in batch:
+                    self.loaded[batch_id] = fetched.get(batch_id, {})
+
+            return self.loaded[id]
+
+
+class LazyArticle(BaseArticle):
+    """Article which only loads the content and formatted content from Elasticsearch when first accessed, through the loader shared with the rest of the result set"""
+
+    _loader: ArticleBodyLoader | None = PrivateAttr(default=None)
+
+    def _load(self, field: str) -> str:
+        if self._loader is None:
+            raise RuntimeError(
+                f'The lazy article with ID "{self.id}" isn\'t attached to a loader'
+            )
+
+        value: str | None = self._loader.get(self.id).get(field)
+
+        if value is None:
+            raise LookupError(
+                f'The {field} of the article with ID "{self.id}" couldn\'t be loaded'
+            )
+
+        return value
+
+    @property
+    def content(self) -> str:
+        return self._load("content")
+
+    @property
+    def formatted_content(self) -> str:
+        return self._load("formatted_content")
+
+    @property
+    def hydrated(self) -> bool:
+        return self._loader is not None and self.id in self._loader.loaded
+
+    def to_full(self) -> FullArticle:
+        return FullArticle.model_validate(
+            {
+                **self.model_dump(),
+                "content": self.content,
+                "formatted_content": self.formatted_content,
+            }
+        )
+
+
 class PartialArticle(AbstractArticle, AbstractPartialDocument):
     title: (
         Annotated[
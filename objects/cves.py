@@ -112,7 +112,7 @@ class FullCVE(BaseCVE):
 
 
 class PartialCVE(AbstractCVE, AbstractPartialDocument):
-    cve: int | None = None
+    cve: str | None = None
     document_count: int | None = None
 
     title: str | None = None
@@ -132,6 +132,7 @@ class PartialCVE(AbstractCVE, AbstractPartialDocument):
             "Rejected",
             "Modified",
             "Undergoing Analysis",
+            "Deferred",
         ]
         | None
     ) = None
@@ -141,4 +142,4 @@ class PartialCVE(AbstractCVE, AbstractPartialDocument):
 
     documents: set[str] | None = None
     dating: set[Annotated[datetime, AwareDatetime]] | None = None
-    references: list[CVEReference]
+    references: list[CVEReference] | None = None
@@ -1,10 +1,24 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import functools
+import hashlib
+import logging
 import os
+import threading
+from time import monotonic
+from typing import TYPE_CHECKING
 from typing_extensions import Literal
 
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from soupsieve import SoupSieve
+
 PROFILE_PATH = os.path.normcase("./profiles/profiles/")
 
+logger = logging.getLogger("osinter")
+
 
 class ScrapingTargets(BaseModel):
     container_list: str
@@ -51,43 +65,393 @@ class Profile(BaseModel):
     scraping: ProfileScraping
 
 
-def list_profiles(
-    complete_file_name: bool = False, include_disabled: bool = False, path: str | None = None
-) -> list[str]:
-    def is_profile(name: str) -> bool:
-        if name.endswith(".profile"):
-            return True
-        if include_disabled and name.endswith(".disabled"):
-            return True
+class InvalidSelectorError(Exception):
+    def __init__(self, profile_name: str, errors: list[tuple[str, str, str]]) -> None:
+        self.profile_name = profile_name
+        self.errors = errors
 
-        return False
+        super().__init__(
+            f'Profile "{profile_name}" contains invalid CSS selectors:\n'
+            + "\n".join(
+                f'  {location}: "{selector}" ({reason})'
+                for location, selector, reason in errors
+            )
+        )
 
-    def strip_extension(name: str) -> str:
-        return name.removesuffix(".profile").removesuffix(".disabled")
 
-    if complete_file_name:
-        return [x for x in os.listdir(path if path else PROFILE_PATH) if is_profile(x)]
-    else:
-        return [strip_extension(x) for x in os.listdir(path if path else PROFILE_PATH) if is_profile(x)]
+@functools.lru_cache(maxsize=4096)
+def compile_selector(selector: str) -> "SoupSieve":
+    try:
+        import soupsieve
+    except ImportError as e:
+        raise ImportError(
+            "Compiling profile selectors requires soupsieve and beautifulsoup4 to be installed"
+        ) from e
 
+    return soupsieve.compile(selector)
 
-def get_profile(specific_profile: str, path: str | None = None) -> Profile:
-    if not specific_profile.endswith(".profile") and not specific_profile.endswith(
-        ".disabled"
-    ):
-        specific_profile += ".profile"
 
-    with open(os.path.join(path if path else PROFILE_PATH, specific_profile)) as f:
-        return Profile.model_validate_json(f.read())
+# Compiled selectors are picklable, so compiled profiles can be sent to worker processes
+@dataclass(frozen=True)
+class CompiledElementSelector:
+    element: "SoupSieve"
+    content_field: str
+
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    profile: Profile
+
+    container_list: "SoupSieve"
+    link_containers: "SoupSieve"
+    links: "SoupSieve"
+
+    # None for meta fields without a selector
+    meta: dict[str, "SoupSieve | CompiledElementSelector | None"]
+
+    content_container: "SoupSieve"
+    content_remove: tuple["SoupSieve", ...]
+
+
+def compile_profile(profile: Profile) -> CompiledProfile:
+    """Compiles every CSS selector in the profile, raising an InvalidSelectorError listing all the invalid ones"""
+    errors: list[tuple[str, str, str]] = []
+
+    def compile(location: str, selector: str) -> "SoupSieve":
+        from soupsieve import SelectorSyntaxError
+
+        try:
+            return compile_selector(selector)
+        except SelectorSyntaxError as e:
+            errors.append((location, selector, str(e).splitlines()[0]))
+        except ValueError as e:
+            errors.append((location, selector, str(e)))
+
+        return None  # type: ignore[return-value]
+
+    targets = profile.source.scraping_targets
+
+    meta: dict[str, SoupSieve | CompiledElementSelector | None] = {}
+
+    for field_name in ArticleMeta.model_fields:
+        selector: str | ElementSelector = getattr(profile.scraping.meta, field_name)
+        location = f"scraping.meta.{field_name}"
+
+        if isinstance(selector, ElementSelector):
+            meta[field_name] = CompiledElementSelector(
+                compile(f"{location}.element", selector.element),
+                selector.content_field,
+            )
+        else:
+            meta[field_name] = compile(location, selector) if selector else None
+
+    compiled = CompiledProfile(
+        profile=profile,
+        container_list=compile(
+            "source.scraping_targets.container_list", targets.container_list
+        ),
+        link_containers=compile(
+            "source.scraping_targets.link_containers", targets.link_containers
+        ),
+        links=compile("source.scraping_targets.links", targets.links),
+        meta=meta,
+        content_container=compile(
+            "scraping.content.container", profile.scraping.content.container
+        ),
+        content_remove=tuple(
+            compile(f"scraping.content.remove[{i}]", selector)
+            for i, selector in enumerate(profile.scraping.content.remove)
+        ),
+    )
+
+    if errors:
+        raise InvalidSelectorError(profile.source.profile_name, errors)
+
+    return compiled
+
+
+@dataclass
+class CachedProfile:
+    mtime_ns: int
+    size: int
+    digest: str
+    profile: Profile
+    compiled: CompiledProfile | None = None
+
+
+class ProfileRegistry:
+    """
+    Keeps the validated profiles of a directory in memory.
+    Files are only read again when their modification time or size changes, and only validated again when their content hash does.
+    The selectors of a profile are compiled when it's loaded, so profiles with invalid selectors fail to load like invalid ones.
+    Unless the directory is watched, it is checked for changes at most every `refresh_interval` seconds when profiles are requested.
+    The returned profiles are shared between callers, and shouldn't be modified.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        refresh_interval: float | None = 2.0,
+        max_workers: int = 8,
+        parallel_threshold: int = 32,
+    ) -> None:
+        self.path = path if path else PROFILE_PATH
+        self.refresh_interval = refresh_interval
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+
+        self.entries: dict[str, CachedProfile] = {}
+        # Modification time and size of files which failed to load, along with the error
+        self._failed: dict[str, tuple[tuple[int, int], Exception]] = {}
+
+        self._last_refresh: float | None = None
+        self._lock = threading.RLock()
+        self._watcher: threading.Thread | None = None
+        self._stop_watching = threading.Event()
+
+    @staticmethod
+    def _load(
+        file_path: str,
+    ) -> tuple[str, Profile, CompiledProfile | None] | Exception:
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+
+            profile = Profile.model_validate_json(content.strip())
+
+            try:
+                compiled: CompiledProfile | None = compile_profile(profile)
+            except ImportError:
+                # Without soupsieve the profiles can still be read, and compiling fails when requested instead
+                compiled = None
+
+            return hashlib.sha256(content).hexdigest(), profile, compiled
+        except (OSError, ValueError, InvalidSelectorError) as e:
+            logger.error(f'Failed to load profile from "{file_path}", skipping it: {e}')
+            return e
+
+    def refresh(self) -> set[str]:
+        """Synchronizes the cache with the directory, and returns the file names of the profiles which were added, changed or removed"""
+        with self._lock:
+            stats = {
+                entry.name: entry.stat()
+                for entry in os.scandir(self.path)
+                if entry.name.endswith((".profile", ".disabled")) and entry.is_file()
+            }
+
+            def is_modified(name: str, stat: os.stat_result) -> bool:
+                key = (stat.st_mtime_ns, stat.st_size)
+
+                if name in self._failed and self._failed[name][0] == key:
+                    return False
+
+                return name not in self.entries or (
+                    self.entries[name].mtime_ns,
+                    self.entries[name].size,
+                ) != key
+
+            modified = [name for name, stat in stats.items() if is_modified(name, stat)]
+
+            file_paths = [os.path.join(self.path, name) for name in modified]
+
+            if len(file_paths) >= self.parallel_threshold:
+                with ThreadPoolExecutor(self.max_workers) as executor:
+                    loaded = list(executor.map(self._load, file_paths))
+            else:
+                loaded = [self._load(file_path) for file_path in file_paths]
+
+            changed: set[str] = set()
+
+            for name, result in zip(modified, loaded):
+                # Invalid files keep their previously loaded profile, if any, and aren't loaded again until they change
+                if isinstance(result, Exception):
+                    self._failed[name] = (
+                        (stats[name].st_mtime_ns, stats[name].st_size),
+                        result,
+                    )
+                    continue
+
+                self._failed.pop(name, None)
+                digest, profile, compiled = result
+
+                # Touched files with unchanged content keep their existing profile object
+                if name in self.entries and self.entries[name].digest == digest:
+                    profile = self.entries[name].profile
+                    compiled = self.entries[name].compiled
+                else:
+                    changed.add(name)
+
+                self.entries[name] = CachedProfile(
+                    stats[name].st_mtime_ns,
+                    stats[name].st_size,
+                    digest,
+                    profile,
+                    compiled,
+                )
+
+            removed = set(self.entries) - set(stats)
+
+            for name in removed:
+                del self.entries[name]
+
+            for name in set(self._failed) - set(stats):
+                del self._failed[name]
+
+            self._last_refresh = monotonic()
+
+            return changed | removed
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            if self._last_refresh is None or (
+                not self.watching
+                and self.refresh_interval is not None
+                and monotonic() - self._last_refresh >= self.refresh_interval
+            ):
+                self.refresh()
+
+    def list_profiles(
+        self, complete_file_name: bool = False, include_disabled: bool = False
+    ) -> list[str]:
+        with self._lock:
+            self._ensure_fresh()
+
+            names = [
+                name
+                for name in self.entries
+                if name.endswith(".profile")
+                or (include_disabled and name.endswith(".disabled"))
+            ]
+
+        if complete_file_name:
+            return names
+        else:
+            return [
+                name.removesuffix(".profile").removesuffix(".disabled") for name in names
+            ]
+
+    @staticmethod
+    def _file_name(specific_profile: str) -> str:
+        if not specific_profile.endswith(".profile") and not specific_profile.endswith(
+            ".disabled"
+        ):
+            specific_profile += ".profile"
+
+        return specific_profile
+
+    def get_profile(self, specific_profile: str) -> Profile:
+        specific_profile = self._file_name(specific_profile)
+
+        with self._lock:
+            self._ensure_fresh()
+
+            if specific_profile not in self.entries:
+                # The file may have been added since the last refresh
+                self.refresh()
+
+            # Files which exist but failed to load report why instead
+            if specific_profile not in self.entries and specific_profile in self._failed:
+                raise self._failed[specific_profile][1]
+
+            if specific_profile not in self.entries:
+                raise FileNotFoundError(
+                    f'No profile named "{specific_profile}" in "{self.path}"'
+                )
+
+            return self.entries[specific_profile].profile
+
+    def get_compiled_profile(self, specific_profile: str) -> CompiledProfile:
+        """Returns the profile with the selectors compiled when it was loaded"""
+        profile = self.get_profile(specific_profile)
+
+        with self._lock:
+            entry = self.entries.get(self._file_name(specific_profile))
+
+            # The profile may have been replaced by a refresh in the meantime
+            if not entry or entry.profile is not profile:
+                return compile_profile(profile)
+
+            if not entry.compiled:
+                entry.compiled = compile_profile(profile)
+
+            return entry.compiled
+
+    def get_profiles(self, include_disabled: bool = False) -> list[Profile]:
+        # The lock is held throughout, so a refresh by the watcher can't change the entries between listing and reading them
+        with self._lock:
+            return [
+                self.entries[name].profile
+                for name in self.list_profiles(
+                    complete_file_name=True, include_disabled=include_disabled
+                )
+            ]
+
+    @property
+    def watching(self) -> bool:
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def watch(
+        self,
+        interval: float = 5.0,
+        on_change: Callable[[set[str]], None] | None = None,
+    ) -> None:
+        """Refreshes the profiles every `interval` seconds in a background thread, calling `on_change` with the names of changed files"""
+        if self.watching:
+            return
+
+        self._stop_watching.clear()
+
+        def run() -> None:
+            while not self._stop_watching.wait(interval):
+                try:
+                    changed = self.refresh()
+                except Exception as e:
+                    logger.error(f'Failed to refresh profiles in "{self.path}": {e}')
+                    continue
+
+                if changed and on_change:
+                    on_change(changed)
+
+        self._ensure_fresh()
+
+        self._watcher = threading.Thread(target=run, name="profile-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+
+_registries: dict[str, ProfileRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_profile_registry(path: str | None = None) -> ProfileRegistry:
+    path = path if path else PROFILE_PATH
+
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = ProfileRegistry(path)
+
+        return _registries[path]
+
+
+def list_profiles(
+    complete_file_name: bool = False, include_disabled: bool = False, path: str | None = None
+) -> list[str]:
+    return get_profile_registry(path).list_profiles(complete_file_name, include_disabled)
+
+
+def get_profile(specific_profile: str, path: str | None = None) -> Profile:
+    return get_profile_registry(path).get_profile(specific_profile)
 
 
 def get_profiles(include_disabled: bool = False, path: str | None = None) -> list[Profile]:
-    profiles: list[Profile] = []
+    return get_profile_registry(path).get_profiles(include_disabled)
 
-    for profile_name in list_profiles(
-        complete_file_name=True, include_disabled=include_disabled, path=path
-    ):
-        with open(os.path.join(path if path else PROFILE_PATH, profile_name)) as f:
-            profiles.append(Profile.model_validate_json(f.read().strip()))
 
-    return profiles
+def get_compiled_profile(specific_profile: str, path: str | None = None) -> CompiledProfile:
+    return get_profile_registry(path).get_compiled_profile(specific_profile)